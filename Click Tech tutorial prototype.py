@@ -1,31 +1,611 @@
 import tkinter as tk
-import random, json, os
-import math
-from random import uniform
+import random, json, os, sys, gzip, struct, mmap, tempfile, zlib
+import math, time, argparse, traceback, tracemalloc, io
+from types import SimpleNamespace
+from collections import deque, OrderedDict
+from bisect import bisect_left
+from array import array
+from contextlib import contextmanager, redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # Batched movers fall back to plain Python lists
 
 # ---------- Config ----------
 WIDTH, HEIGHT = 600, 500
 CLOUD_COUNT = 8
+CLOUD_TICK_MS = 50 # Cloud drift step while the window has focus
+CLOUD_IDLE_TICK_MS = 250 # Slower step while unfocused; while minimised the clouds pause
 BG_COLOR = "skyblue"
 ACCENT = "red" # Used for accents, now for the clicker button trapezoid
 HIGHSCORE_FILE = "highscores.json"
 SNAKE_GRID_SIZE = 20 # For Snake game
+TICK_MS = 10 # Fixed simulation step; every game period is a multiple of this
+FRAME_MS = 16 # Display frame interval (~60 FPS)
+MAX_CATCHUP_TICKS = 8 # Most ticks run in one frame before the clock drops time
+BENCH_BASELINE_FILE = "bench_baseline.json" # Stored results the benchmark suite compares against
+BENCH_TOLERANCE = 0.15 # Fractional growth in peak items or allocations over the baseline reported as a regression
+BENCH_REPEATS = 5 # Timed runs per mode in the suite; the median counts, and only as information
+GOVERNOR_WINDOW = 30 # Frames the quality governor looks at per decision
+GOVERNOR_SLOW_MS = 2 * FRAME_MS # Median frame interval above this drops a quality level
+GOVERNOR_FAST_MS = 1.25 * FRAME_MS # ... below this for GOVERNOR_CALM_WINDOWS windows in a row wins one back
+GOVERNOR_CALM_WINDOWS = 4
+# Per quality level: share of effect particles, share of clouds shown, cloud
+# drift every n steps and asteroid/enemy spawn rate
+QUALITY_LEVELS = (
+    {'particles': 1.0, 'clouds': 1.0, 'cloud_every': 1, 'spawn': 1.0},
+    {'particles': 0.5, 'clouds': 0.75, 'cloud_every': 2, 'spawn': 0.85},
+    {'particles': 0.25, 'clouds': 0.5, 'cloud_every': 3, 'spawn': 0.7},
+    {'particles': 0.1, 'clouds': 0.25, 'cloud_every': 4, 'spawn': 0.5},
+)
+
+# ---------- Scene model (runs with or without a window) ----------
+def flatten_coords(args):
+    """Turns create_*/coords arguments (flat numbers or nested lists) into a flat float list."""
+    flat = []
+    for a in args:
+        if isinstance(a, (list, tuple)): flat.extend(flatten_coords(a))
+        else: flat.append(float(a))
+    return flat
+
+def font_size(font):
+    """Point size out of a Tk font spec such as ("Arial", 12, "bold")."""
+    if isinstance(font, (list, tuple)) and len(font) > 1: return abs(int(font[1]))
+    if isinstance(font, str) and len(font.split()) > 1: return abs(int(font.split()[1]))
+    return 10
+
+
+class SceneItem:
+    """One canvas item as the games see it: type, coordinates, tags and options.
+
+    Items are the source of truth for every game: positions live in `coords`
+    and the bounding box is cached in `box` until the item moves or changes.
+    """
+    __slots__ = ("id", "type", "coords", "tags", "options", "z", "box")
+
+    def bbox(self):
+        """Integer bounding box in the same sense as tk.Canvas.bbox, or None when hidden."""
+        if self.box is False: self.box = self._measure()
+        return self.box
+
+    def _measure(self):
+        opts = self.options
+        if opts.get("state") == "hidden" or not self.coords: return None
+        c = self.coords
+        if self.type in ("text", "window", "image"):
+            x, y = c[0], c[1]
+            if self.type == "text":
+                lines = str(opts.get("text", "")).split("\n")
+                size = font_size(opts.get("font"))
+                w, h = size * 0.75 * max(len(l) for l in lines), size * 1.6 * len(lines)
+            elif self.type == "image" and opts.get("image") is not None and hasattr(opts["image"], "width"):
+                w, h = opts["image"].width(), opts["image"].height()
+            else:
+                w = h = 0
+            anchor = opts.get("anchor", "center")
+            x0 = x - w if "e" in anchor else x if "w" in anchor else x - w / 2
+            y0 = y - h if "s" in anchor else y if "n" in anchor else y - h / 2
+            return (int(math.floor(x0)), int(math.floor(y0)), int(math.ceil(x0 + w)), int(math.ceil(y0 + h)))
+        xs, ys = c[0::2], c[1::2]
+        # The outline is drawn centred on the shape edge, so half its width pads the box
+        outlined = self.type == "line" or opts.get("outline", "black" if self.type != "polygon" else "") != ""
+        pad = float(opts.get("width", 1)) / 2 if outlined else 0
+        return (int(math.floor(min(xs) - pad)), int(math.floor(min(ys) - pad)),
+                int(math.ceil(max(xs) + pad)), int(math.ceil(max(ys) + pad)))
+
+
+class Scene:
+    """Pure-Python model of everything drawn on the game canvas.
+
+    It answers the tk.Canvas calls the games make (create_*, coords, bbox,
+    move, find_*, tags and options) from Python data, so every game runs the
+    same with or without a window. When a CanvasMirror is attached each change
+    is also pushed onto the real Tk canvas; reads never go back to Tcl.
+    """
+
+    def __init__(self, mirror=None, **options):
+        self.mirror = mirror
+        self.items = {} # item id -> SceneItem
+        self.tag_index = {} # tag -> set of item ids
+        self.options = dict(options)
+        self.bindings = {}
+        self.tag_bindings = {}
+        self.current_item = None # Item under the pointer when headless or replaying
+        self.next_id = 1
+        self.top_z = self.bottom_z = 0
+
+    # --- lookup ---
+    def _ids(self, tag):
+        """Item ids matching an id or tag, in stacking order (bottom first)."""
+        if isinstance(tag, str) and tag.isdigit(): tag = int(tag)
+        if isinstance(tag, int): return [tag] if tag in self.items else []
+        if tag == "all": ids = self.items
+        elif tag == "current":
+            ids = self.mirror.current() if self.mirror and self.current_item is None else (self.current_item,)
+            ids = [i for i in ids if i in self.items]
+        else: ids = self.tag_index.get(tag, ())
+        return sorted(ids, key=lambda i: self.items[i].z)
+
+    def _first(self, tag):
+        if isinstance(tag, int): return self.items.get(tag)
+        ids = self._ids(tag)
+        return self.items[ids[0]] if ids else None
+
+    def find_all(self):
+        return tuple(self._ids("all"))
+
+    def find_withtag(self, tag):
+        return tuple(self._ids(tag))
+
+    def find_overlapping(self, x1, y1, x2, y2):
+        hits = []
+        for item in self.items.values():
+            b = item.bbox()
+            if b and b[0] <= x2 and b[2] >= x1 and b[1] <= y2 and b[3] >= y1:
+                hits.append(item)
+        hits.sort(key=lambda i: i.z)
+        return tuple(i.id for i in hits)
+
+    # --- items ---
+    def _create(self, kind, args, kw):
+        coords = flatten_coords(args)
+        tags = kw.get("tags", ())
+        if isinstance(tags, str): tags = tuple(tags.split())
+        if self.mirror:
+            item_id = self.mirror.create(kind, coords, kw)
+        else:
+            item_id = self.next_id
+            self.next_id += 1
+        item = SceneItem()
+        item.id, item.type, item.coords, item.tags = item_id, kind, coords, tuple(tags)
+        item.options = {k: v for k, v in kw.items() if k != "tags"}
+        item.box = False
+        self.top_z += 1
+        item.z = self.top_z
+        self.items[item_id] = item
+        for t in item.tags: self.tag_index.setdefault(t, set()).add(item_id)
+        return item_id
+
+    def create_oval(self, *args, **kw): return self._create("oval", args, kw)
+    def create_rectangle(self, *args, **kw): return self._create("rectangle", args, kw)
+    def create_polygon(self, *args, **kw): return self._create("polygon", args, kw)
+    def create_line(self, *args, **kw): return self._create("line", args, kw)
+    def create_text(self, *args, **kw): return self._create("text", args, kw)
+    def create_window(self, *args, **kw): return self._create("window", args, kw)
+    def create_image(self, *args, **kw): return self._create("image", args, kw)
+
+    def coords(self, tag, *args):
+        item = self._first(tag)
+        if not args: return list(item.coords) if item else []
+        if item is None: return
+        item.coords = flatten_coords(args)
+        item.box = False
+        if self.mirror: self.mirror.dirty[item.id] = item.coords
+
+    def move(self, tag, dx, dy):
+        for i in ([tag] if isinstance(tag, int) and tag in self.items else self._ids(tag)):
+            item = self.items[i]
+            c = item.coords
+            for k in range(0, len(c) - 1, 2):
+                c[k] += dx
+                c[k + 1] += dy
+            item.box = False
+            if self.mirror: self.mirror.dirty[i] = c
+
+    def bbox(self, *tags):
+        boxes = [self.items[i].bbox() for t in tags for i in self._ids(t)]
+        boxes = [b for b in boxes if b]
+        if not boxes: return None
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def set_coords(self, ids, rows):
+        """Moves many items at once: rows[k] becomes the coords of ids[k]."""
+        items = self.items
+        dirty = self.mirror.dirty if self.mirror else None
+        for i, c in zip(ids, rows):
+            item = items.get(i)
+            if item is None: continue
+            item.coords = c
+            item.box = False
+            if dirty is not None: dirty[i] = c
+
+    def delete(self, *tags):
+        if not tags: return
+        for tag in tags:
+            for i in self._ids(tag):
+                item = self.items.pop(i)
+                if self.mirror: self.mirror.dirty.pop(i, None)
+                for t in item.tags:
+                    self.tag_index[t].discard(i)
+                    if not self.tag_index[t]: del self.tag_index[t]
+        if self.mirror: self.mirror.delete(*tags) # One Tcl call for the lot
+
+    def type(self, tag):
+        item = self._first(tag)
+        return item.type if item else None
+
+    def gettags(self, tag):
+        item = self._first(tag)
+        return item.tags if item else ()
+
+    def _set_tags(self, item, tags):
+        for t in item.tags:
+            self.tag_index[t].discard(item.id)
+            if not self.tag_index[t]: del self.tag_index[t]
+        item.tags = tuple(tags)
+        for t in item.tags: self.tag_index.setdefault(t, set()).add(item.id)
+
+    def dtag(self, tag, tag_to_delete=None):
+        if tag_to_delete is None: tag_to_delete = tag
+        for i in self._ids(tag):
+            item = self.items[i]
+            if tag_to_delete in item.tags:
+                self._set_tags(item, [t for t in item.tags if t != tag_to_delete])
+        if self.mirror: self.mirror.dtag(tag, tag_to_delete)
+
+    def itemconfigure(self, tag, cnf=None, **kw):
+        if cnf: kw = dict(cnf, **kw)
+        if not kw: return {}
+        for i in self._ids(tag):
+            item = self.items[i]
+            for k, v in kw.items():
+                if k == "tags": self._set_tags(item, v.split() if isinstance(v, str) else v)
+                else: item.options[k] = v
+            item.box = False
+        if self.mirror: self.mirror.itemconfigure(tag, kw)
+
+    itemconfig = itemconfigure
+
+    def itemcget(self, tag, option):
+        item = self._first(tag)
+        if item is None: return ""
+        if option == "tags": return " ".join(item.tags)
+        default = "black" if option == "fill" and item.type in ("line", "text") else ""
+        return str(item.options.get(option, default))
+
+    def item_states(self, ids, option):
+        """(type, coords, option) for many item ids in one pass, None for ids that are gone.
+
+        The coords lists are the items' own, so copy any that are kept.
+        """
+        items, out = self.items, []
+        for i in ids:
+            item = items.get(i)
+            if item is None: out.append(None); continue
+            default = "black" if option == "fill" and item.type in ("line", "text") else ""
+            out.append((item.type, item.coords, str(item.options.get(option, default))))
+        return out
+
+    def tag_raise(self, tag, above=None):
+        for i in self._ids(tag):
+            self.top_z += 1
+            self.items[i].z = self.top_z
+        if self.mirror: self.mirror.tag_raise(tag)
+
+    def tag_lower(self, tag, below=None):
+        for i in reversed(self._ids(tag)):
+            self.bottom_z -= 1
+            self.items[i].z = self.bottom_z
+        if self.mirror: self.mirror.tag_lower(tag)
+
+    # --- events and widget options ---
+    def tag_bind(self, tag, sequence, func, add=None):
+        func = inputs.wrap(tag, sequence, func)
+        self.tag_bindings[(tag, sequence)] = func
+        if self.mirror: self.mirror.tag_bind(tag, sequence, func)
+
+    def tag_unbind(self, tag, sequence, funcid=None):
+        self.tag_bindings.pop((tag, sequence), None)
+        inputs.forget(tag, sequence)
+        if self.mirror: self.mirror.tag_unbind(tag, sequence)
+
+    def bind(self, sequence, func=None, add=None):
+        if func: func = inputs.wrap("canvas", sequence, func)
+        self.bindings[sequence] = func
+        if self.mirror: self.mirror.bind(sequence, func)
+
+    def unbind(self, sequence, funcid=None):
+        self.bindings.pop(sequence, None)
+        inputs.forget("canvas", sequence)
+        if self.mirror: self.mirror.unbind(sequence)
+
+    def send(self, sequence, x=0, y=0, **fields):
+        """Delivers a pointer event at (x, y) like Tk would: item bindings first, then the canvas's.
+
+        A press picks the topmost item under the pointer as "current"; it
+        stays current through the drag and is let go on release.
+        """
+        event = SimpleNamespace(x=x, y=y, widget=self, **fields)
+        if sequence == "<Button-1>" or self.current_item not in self.items:
+            hits = self.find_overlapping(x, y, x, y)
+            self.current_item = hits[-1] if hits else None
+        item = self.items.get(self.current_item)
+        if item:
+            for key in (item.id,) + item.tags:
+                func = self.tag_bindings.get((key, sequence))
+                if func: func(event)
+        if sequence in self.bindings and self.bindings[sequence]: self.bindings[sequence](event)
+        if sequence.startswith("<ButtonRelease"): self.current_item = None
+
+    def config(self, cnf=None, **kw):
+        if cnf: kw = dict(cnf, **kw)
+        self.options.update(kw)
+        if self.mirror: self.mirror.configure(kw)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key, "")
+
+    def pack(self, **kw):
+        if self.mirror: self.mirror.view.pack(**kw)
+
+
+class CanvasMirror:
+    """Rendering adapter that replays Scene changes onto a real tk.Canvas.
+
+    Structural changes (create, delete, options, stacking, bindings) go out
+    at once. Position changes are only marked in `dirty` and pushed by flush()
+    once per display frame, as a single coords call per item however many
+    times it moved. `calls` counts every call made into Tcl.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.dirty = {} # item id -> coords list to push on the next flush
+        self.calls = 0
+
+    def create(self, kind, coords, options):
+        self.calls += 1
+        return getattr(self.view, "create_" + kind)(*coords, **options)
+
+    def flush(self):
+        view = self.view
+        for item_id, coords in self.dirty.items():
+            view.coords(item_id, *coords)
+        self.calls += len(self.dirty)
+        self.dirty.clear()
+
+    def _send(self, method, *args, **kw):
+        self.calls += 1
+        return getattr(self.view, method)(*args, **kw)
+
+    def delete(self, *tags): self._send("delete", *tags)
+    def dtag(self, tag, tag_to_delete): self._send("dtag", tag, tag_to_delete)
+    def itemconfigure(self, tag, options): self._send("itemconfigure", tag, **options)
+    def tag_raise(self, tag): self._send("tag_raise", tag)
+    def tag_lower(self, tag): self._send("tag_lower", tag)
+    def tag_bind(self, tag, sequence, func): self._send("tag_bind", tag, sequence, func)
+    def tag_unbind(self, tag, sequence): self._send("tag_unbind", tag, sequence)
+    def bind(self, sequence, func): self._send("bind", sequence, func)
+    def unbind(self, sequence): self._send("unbind", sequence)
+    def configure(self, options): self._send("configure", **options)
+
+    def current(self):
+        return self._send("find_withtag", "current")
+
+
+class InputRecorder:
+    """Records player input against the simulation tick, and plays it back.
+
+    Every key, canvas and button binding the games make is wrapped here, so
+    each event can be logged as (tick, target, sequence, x, y, item) with the
+    tick counted from the start of the session. A replay delivers each event
+    just before the tick it was recorded on; with the same session seed the
+    games then run exactly as they did.
+    """
+
+    def __init__(self):
+        self.recording = False
+        self.replaying = False
+        self.delivering = False
+        self.events = []
+        self.pending = deque()
+        self.handlers = {} # (target, sequence) -> the wrapped handler currently bound
+        self.start_tick = 0
+
+    WINDOW_EVENTS = ("<Map>", "<Unmap>", "<FocusIn>", "<FocusOut>") # Window state, not player input
+
+    def wrap(self, target, sequence, func):
+        if sequence in self.WINDOW_EVENTS: return func
+        def handler(*args):
+            if self.replaying and not self.delivering: return # Live input is ignored during a replay
+            if self.recording: self.log(target, sequence, args[0] if args else None)
+            return func(*args)
+        self.handlers[(target, sequence)] = handler
+        return handler
+
+    def forget(self, target, sequence):
+        self.handlers.pop((target, sequence), None)
+
+    def log(self, target, sequence, event):
+        item = None
+        if target not in ("root", "canvas", "button", "governor"): # Tag bindings act on the item under the pointer
+            current = canvas.find_withtag("current")
+            item = current[0] if current else None
+        self.events.append((clock.sim_ms // TICK_MS - self.start_tick, target, sequence,
+                            getattr(event, "x", 0), getattr(event, "y", 0), item))
+
+    def record(self):
+        self.recording, self.events = True, []
+        self.start_tick = clock.sim_ms // TICK_MS
+
+    def save(self, path, game=None):
+        """Writes the recording: targets are stored once, ticks as deltas, all gzipped."""
+        targets, index, flat, last = [], {}, [], 0
+        for tick, target, sequence, x, y, item in self.events:
+            key = (target, sequence)
+            if key not in index:
+                index[key] = len(targets)
+                targets.append(key)
+            flat += [tick - last, index[key], x, y, item or 0]
+            last = tick
+        replay = {'version': 1, 'seed': session_seed, 'game': game,
+                  'ticks': clock.sim_ms // TICK_MS - self.start_tick, 'targets': targets, 'events': flat}
+        with gzip.open(path, "wt") as f:
+            json.dump(replay, f, separators=(",", ":"))
+        status(f"Recorded {len(self.events)} inputs over {replay['ticks']} ticks to {path}")
+
+    def play(self, replay):
+        """Queues a loaded replay's events from the current tick on; returns the tick it ends on."""
+        self.start_tick = clock.sim_ms // TICK_MS
+        self.pending = deque((self.start_tick + e[0],) + e[1:] for e in replay['events'])
+        self.replaying = True
+        clock.tick_hooks.append(self.deliver)
+        return self.start_tick + replay['ticks']
+
+    def stop(self):
+        self.replaying = False
+        self.pending.clear()
+        if self.deliver in clock.tick_hooks: clock.tick_hooks.remove(self.deliver)
+
+    def deliver(self):
+        """Runs the handlers of every event recorded for the tick about to be stepped."""
+        tick = clock.sim_ms // TICK_MS
+        while self.pending and self.pending[0][0] <= tick:
+            _, target, sequence, x, y, item = self.pending.popleft()
+            handler = self.handlers.get((target, sequence))
+            if handler is None: continue
+            self.delivering, canvas.current_item = True, item
+            try:
+                if target == "button": handler()
+                else: handler(SimpleNamespace(x=x, y=y, keysym=sequence.strip("<>"), widget=canvas))
+            finally:
+                self.delivering, canvas.current_item = False, None
+
+inputs = InputRecorder()
+
+def load_replay(path):
+    """Reads a file written by InputRecorder.save back into absolute-tick events."""
+    with gzip.open(path, "rt") as f:
+        replay = json.load(f)
+    events, tick, flat = [], 0, replay['events']
+    for k in range(0, len(flat), 5):
+        dtick, target, x, y, item = flat[k:k + 5]
+        tick += dtick
+        events.append((tick,) + tuple(replay['targets'][target]) + (x, y, item or None))
+    replay['events'] = events
+    return replay
+
+
+class GameRoot(tk.Tk):
+    """The real Tk root window, with its key bindings routed through the input recorder."""
+
+    def bind(self, sequence=None, func=None, add=None):
+        if func: func = inputs.wrap("root", sequence, func)
+        return super().bind(sequence, func, add)
+
+    def unbind(self, sequence, funcid=None):
+        inputs.forget("root", sequence)
+        return super().unbind(sequence, funcid)
+
+
+class HeadlessRoot:
+    """Stands in for tk.Tk without a display: bindings and timers stay in Python."""
+
+    def __init__(self):
+        self.bindings = {}
+
+    def title(self, *args): pass
+    def quit(self): pass
+    def mainloop(self): pass
+    def update(self): pass
+
+    def bind(self, sequence, func=None, add=None):
+        if func: func = inputs.wrap("root", sequence, func)
+        self.bindings[sequence] = func
+
+    def unbind(self, sequence, funcid=None):
+        self.bindings.pop(sequence, None)
+        inputs.forget("root", sequence)
+
+    def after(self, ms, func, *args):
+        # Timers run on simulation time, so they fire as the clock is stepped
+        return clock.after(ms, lambda: func(*args), group="timers")
 
-root = tk.Tk()
-root.title("Click Tech Tutorial Prototype")
-canvas = tk.Canvas(root, width=WIDTH, height=HEIGHT, bg=BG_COLOR)
+    def after_cancel(self, task):
+        clock.cancel_task(task)
+
+    def send(self, sequence, **fields):
+        """Fires the handler bound to sequence with a fake event, like a key press would."""
+        func = self.bindings.get(sequence)
+        if func: return func(SimpleNamespace(keysym=sequence.strip("<>"), x=0, y=0, **fields))
+
+
+class HeadlessWidget:
+    """Stands in for a Tk button when there is no window."""
+    count = 0
+
+    def __init__(self, **options):
+        HeadlessWidget.count += 1
+        self.name = f".!headless{HeadlessWidget.count}"
+        self.options = options
+
+    def config(self, **kw): self.options.update(kw)
+    configure = config
+    def destroy(self): pass
+
+    def invoke(self):
+        if self.options.get("command"): return self.options["command"]()
+
+    def __str__(self): return self.name
+
+
+def make_button(**options):
+    """Creates a tk.Button on the root window, or a HeadlessWidget when headless."""
+    if options.get("command"): # Keyed by label, or by colour for the unlabelled swatches
+        options["command"] = inputs.wrap("button", options.get("text") or options.get("bg"), options["command"])
+    if HEADLESS: return HeadlessWidget(**options)
+    return tk.Button(root, **options)
+
+
+VERBOSE = "--verbose" in sys.argv or os.environ.get("CLICKTECH_VERBOSE") == "1"
+
+def status(message):
+    """Prints a status message (recordings saved and the like) when running with --verbose."""
+    if VERBOSE: print(message)
+
+HEADLESS = "--headless" in sys.argv or "--bench" in sys.argv or "--export" in sys.argv or os.environ.get("CLICKTECH_HEADLESS") == "1"
+HEADLESS = HEADLESS or __name__ == "__mp_main__" # A worker process (export) never needs a window
+if not HEADLESS:
+    try:
+        root = GameRoot()
+    except tk.TclError:
+        print("No display available, running headless.")
+        HEADLESS = True
+if HEADLESS:
+    root = HeadlessRoot()
+    canvas = Scene(width=WIDTH, height=HEIGHT, bg=BG_COLOR)
+else:
+    root.title("Click Tech Tutorial Prototype")
+    canvas = Scene(CanvasMirror(tk.Canvas(root, width=WIDTH, height=HEIGHT, bg=BG_COLOR)), width=WIDTH, height=HEIGHT, bg=BG_COLOR)
 canvas.pack()
 
 # ---------- Global state ----------
+rng = random.Random() # Per-session RNG: every game draws from it, so a seed replays a session
+scenery_rng = random.Random() # Clouds draw from their own RNG, so their pace never shifts the games'
+session_seed = None
+
+def new_session(seed=None):
+    """Seeds the session RNGs, with a fresh random seed when none is given."""
+    global session_seed
+    session_seed = seed if seed is not None else random.randrange(2 ** 32)
+    rng.seed(session_seed)
+    scenery_rng.seed(session_seed + 1)
+
 state = "menu"
-ui_buttons, after_ids = [], []
+ui_buttons = []
 score, score_text_id = 0, None
 menu_items = [] # Stores {text, command, button_id} for menu navigation
 menu_selection = 0 # Index of the currently selected menu item
 
-# Cloud movement data (holds ID, angle, and radius for rotation)
+# Cloud layer: one {ids, x, y, w, h, speed} per cloud, drawn from these positions
 cloud_data = []
-cloud_ids = []
+cloud_pace = "focused" # "focused", "unfocused" or "hidden", from the window's state
+window_visible, window_focused = True, True
 
 # load/save highscores
 def load_highscores():
@@ -39,6 +619,7 @@ def load_highscores():
     return {}
 
 def save_highscores_file():
+    if HEADLESS or inputs.replaying: return # Simulated and replayed runs never touch the player's scores
     try:
         with open(HIGHSCORE_FILE, "w") as f:
             json.dump(high_scores, f)
@@ -51,13 +632,21 @@ high_scores = {"earthprotector":0,"flight":0,"clicker":0,"breakout":0,"snake":0,
 high_scores.update(load_highscores())
 
 # game globals
-asteroids, bullets, ship_id = [], [], None
-enemies, enemy_bullets, pbot_bullets = [], [], []
+asteroids, ship_id = [], None
+ep_mode = "earthprotector" # High score key: "earthprotector-swarm" with a P-Bot swarm
+enemies, pbot_bullets = [], []
+bullets, enemy_bullets = None, None # BodyBatch movers, made in reset_game_vars
 pbots = []
-buildings, plane_id, flight_speed, hud_text = [], None, 6, None
-paddle_id, ball_pairs, brick_ids = None, [], [] # ball_pairs: [{id, dx, dy}]
+ep_grid = None # SpatialHash of Earth Protector collidables, made in reset_game_vars
+plane_id, flight_speed, hud_text = None, 6, None
+terrain, camera, plane_pos = None, None, None # Flight's Terrain and Camera, and the plane's nose in world coords
+paddle_id, balls, powerups = None, None, None # BallBatch and falling power-up BodyBatch, made in reset_game_vars
+breakout_stress = False # Stress mode: the floor bounces and cleared bricks come back
+brick_grid, bricks_left = [], 0 # brick_grid[row][col]: brick id, or None once broken
 click_count, clickbtn_id = 0, None
-snake_cells, snake_dir, food_pos = [], (1,0), None
+snake, snake_dir = None, (1,0) # snake: SnakeBoard of the running game
+snake_items, food_id = deque(), None # Rectangle ids in body order (head first), and the food oval
+snake_grid_photo = None # Grid lines drawn once into an image, reused by every game
 is_game_over = False # Generic game over flag
 
 # New global state variables for game updates
@@ -66,30 +655,320 @@ is_cockpit_view = False # State for Flight Simulator
 cockpit_ids = [] 	 	# Elements for cockpit view
 is_first_start = True 	# Flag for the welcome message
 last_x, last_y = 0, 0   # For Drawing Studio
+stroke, ink_raster = None, None # Drawing Studio: the stroke being drawn, and the RasterLayer finished ones go to
 
 # Drawing Studio State
 draw_color = "black"
 draw_size = 5
 
 # Animation Studio State
-frames = [] # List of canvas item configurations
+frames = [] # List of keyframes: {shape id: {type, coords, fill}}; playback tweens between them
 current_frame_index = 0
 animation_running = False
 frame_index_text_id = None # Canvas text ID for frame display
 drag_data = {"x": 0, "y": 0, "item": None} # For animation shape dragging
+anim_items, anim_shown = {}, {} # Shape id -> its canvas item, and the frame data it currently shows
+anim_base = None # The frame last loaded onto the canvas, for diffing against (None once cleared)
+frame_deltas = {} # (id(from frame), id(to frame)) -> (from, to, shape ids whose data differs)
+next_shape_id = 1
+anim_fps, anim_ease = 20, "linear" # Playback rate and in-between easing; keyframes stay anim_keyframe_ms apart
+anim_keyframe_ms = 100 # Playback time from one keyframe to the next (Ctrl+K); saved with the project
+anim_elapsed = 0 # Playback ms since the current keyframe
+anim_moved = set() # Shape ids off the frame data they show: dragged, tweened or new since the last load
+frame_tweens = {} # (id(from), id(to)) -> (from, to, moving shape ids, start rows, row deltas)
+anim_export = None # The AnimExport under way, if any
+
+
+# ---------- Game Clock (fixed timestep) ----------
+class GameClock:
+    """Drives every game loop from one root.after frame loop.
+
+    Tasks register with a period in simulation milliseconds. Each display
+    frame the clock adds the real elapsed time to an accumulator and runs
+    whole TICK_MS steps out of it, so game speed stays the same however late
+    Tk delivers the frame callback. A task that returns False is dropped.
+
+    Live tasks are also filed by group (their owner: "game", "clouds",
+    "particles", ...), so cancelling a group only touches that group's live
+    tasks and live_counts() can show what each owner is holding on to.
+    Finished tasks leave the run list in one sweep at the end of the tick.
+    """
+
+    def __init__(self):
+        self.tasks = []
+        self.groups = {} # group -> {task key: task}, live tasks only
+        self.next_key = 0
+        self.retired = 0 # Tasks finished since the run list was last swept
+        self.render_hooks = [] # Called once per display frame, after the ticks
+        self.tick_hooks = [] # Called before each tick's tasks (replayed input)
+        self.sim_ms = 0
+        self.accumulator = 0.0
+        self.last_time = None
+        self.frame_id = None
+
+    def every(self, period_ms, fn, group="game", delay_ms=0):
+        """Runs fn every period_ms of simulation time, starting after delay_ms."""
+        task = {'fn': fn, 'period': period_ms, 'due': self.sim_ms + delay_ms, 'group': group, 'alive': True,
+                'key': self.next_key}
+        self.next_key += 1
+        self.tasks.append(task)
+        self.groups.setdefault(group, {})[task['key']] = task
+        return task
+
+    def after(self, delay_ms, fn, group="game"):
+        """Runs fn once, delay_ms of simulation time from now."""
+        return self.every(None, fn, group, delay_ms)
+
+    def cancel(self, group=None):
+        """Drops every task in group, or every task when group is None."""
+        if group is None:
+            for task in self.tasks: task['alive'] = False
+            self.tasks, self.groups, self.retired = [], {}, 0
+            return
+        for task in self.groups.pop(group, {}).values():
+            task['alive'] = False
+            self.retired += 1
+
+    def cancel_task(self, task):
+        if not task['alive']: return
+        task['alive'] = False
+        group = self.groups[task['group']]
+        del group[task['key']]
+        if not group: del self.groups[task['group']]
+        self.retired += 1
+
+    def live(self, group):
+        """The live tasks of a group."""
+        return list(self.groups.get(group, {}).values())
+
+    def live_counts(self):
+        """Live task count per group, for spotting timers that pile up."""
+        return {group: len(tasks) for group, tasks in self.groups.items()}
+
+    def step(self):
+        """Runs the tasks due now, then advances the simulation by one TICK_MS step."""
+        for hook in self.tick_hooks: hook()
+        for task in list(self.tasks):
+            if not task['alive'] or task['due'] > self.sim_ms: continue
+            if task['period'] is None:
+                self.cancel_task(task) # One-shot: gone as soon as it fires
+            else:
+                task['due'] += task['period']
+            try:
+                if task['fn']() is False:
+                    self.cancel_task(task)
+            except Exception:
+                # Like a failing Tk callback: report it and stop only this task
+                traceback.print_exc()
+                self.cancel_task(task)
+        if self.retired:
+            self.tasks = [t for t in self.tasks if t['alive']]
+            self.retired = 0
+        self.sim_ms += TICK_MS
+
+    def start(self):
+        self.last_time = time.perf_counter()
+        self.frame_id = root.after(FRAME_MS, self._frame)
+
+    def frame(self, elapsed_ms):
+        """Runs one display frame: the ticks elapsed_ms pays for, then the render hooks."""
+        start = time.perf_counter()
+        self.accumulator += elapsed_ms
+        ticks = 0
+        while self.accumulator >= TICK_MS and ticks < MAX_CATCHUP_TICKS:
+            self.step()
+            self.accumulator -= TICK_MS
+            ticks += 1
+        if ticks == MAX_CATCHUP_TICKS:
+            # Too far behind to catch up: drop the backlog instead of spiralling
+            self.accumulator = min(self.accumulator, TICK_MS)
+
+        with profiler.phase("render"):
+            for hook in list(self.render_hooks):
+                try:
+                    hook()
+                except Exception:
+                    # Reported and dropped like a failing task, so one bad hook cannot stop the frames
+                    traceback.print_exc()
+                    if hook in self.render_hooks: self.render_hooks.remove(hook)
+        profiler.end_frame((time.perf_counter() - start) * 1000)
+        return ticks
+
+    def _frame(self):
+        now = time.perf_counter()
+        try:
+            self.frame((now - self.last_time) * 1000)
+            governor.sample((now - self.last_time) * 1000) # Only live frames: simulated ones have no real duration
+        finally:
+            self.last_time = now
+            self.frame_id = root.after(FRAME_MS, self._frame)
+
+clock = GameClock()
+
+
+# ---------- Profiler ----------
+PROFILE_DIR = os.environ.get("CLICKTECH_PROFILE_DIR") # Export a profile per game here when set
+FRAME_BUCKETS_MS = (1, 2, 4, 8, 16, 33, 50, 100) # Histogram bucket upper bounds
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class Profiler:
+    """Frame-time and hot-path statistics over a rolling window of frames.
+
+    Game loops wrap their work in `with profiler.phase("collision"):` and the
+    clock reports each frame's duration; the last `window` frames are kept
+    for percentiles, per-phase averages and Tcl calls per frame. F3 toggles
+    a live overlay, and export() writes the numbers to a JSON file.
+    """
+
+    def __init__(self, window=300):
+        self.frame_ms = deque(maxlen=window)
+        self.tcl_calls = deque(maxlen=window)
+        self.phase_ms = {} # phase -> deque of ms spent per frame
+        self.current = {} # phase -> ms spent so far this frame
+        self.last_calls = 0
+        self.overlay_id = None
+        self.show_overlay = False
+        self.frames_seen = 0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[name] = self.current.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def end_frame(self, ms):
+        self.frame_ms.append(ms)
+        calls = canvas.mirror.calls if canvas.mirror else 0
+        self.tcl_calls.append(calls - self.last_calls)
+        self.last_calls = calls
+        for name in self.current.keys() | self.phase_ms.keys():
+            self.phase_ms.setdefault(name, deque(maxlen=self.frame_ms.maxlen)).append(self.current.get(name, 0.0))
+        self.current.clear()
+        self.frames_seen += 1
+        if self.show_overlay and self.frames_seen % 15 == 0: self.draw_overlay()
+
+    def reset(self):
+        """Starts a fresh window (a new game); the overlay stays on if it was on."""
+        show = self.show_overlay
+        self.__init__(self.frame_ms.maxlen)
+        self.show_overlay = show
+
+    def summary(self):
+        frames = list(self.frame_ms)
+        histogram = {f"<={b}ms": 0 for b in FRAME_BUCKETS_MS}
+        histogram[f">{FRAME_BUCKETS_MS[-1]}ms"] = 0
+        for ms in frames:
+            bucket = next((f"<={b}ms" for b in FRAME_BUCKETS_MS if ms <= b), f">{FRAME_BUCKETS_MS[-1]}ms")
+            histogram[bucket] += 1
+        return {
+            'frames': len(frames),
+            'frame_ms': {'p50': round(percentile(frames, 50), 3), 'p95': round(percentile(frames, 95), 3),
+                         'p99': round(percentile(frames, 99), 3), 'max': round(max(frames, default=0.0), 3)},
+            'histogram': histogram,
+            'tcl_calls_per_frame': round(sum(self.tcl_calls) / len(self.tcl_calls), 1) if self.tcl_calls else 0.0,
+            'phases_ms': {name: round(sum(v) / len(v), 4) for name, v in sorted(self.phase_ms.items()) if v},
+        }
+
+    def draw_overlay(self):
+        info = self.summary()
+        f = info['frame_ms']
+        lines = [f"frame p50 {f['p50']:.2f}  p95 {f['p95']:.2f}  p99 {f['p99']:.2f} ms",
+                 f"tcl calls/frame {info['tcl_calls_per_frame']:.1f}",
+                 "timers " + " ".join(f"{g}:{n}" for g, n in clock.live_counts().items()),
+                 f"quality level {governor.level}"]
+        lines += [f"{name:<10} {ms:.3f} ms" for name, ms in info['phases_ms'].items()]
+        if self.overlay_id is None or not canvas.type(self.overlay_id):
+            self.overlay_id = canvas.create_text(10, HEIGHT - 10, anchor="sw", font=("Courier", 9),
+                                                 fill="black", tags=("profiler_overlay",))
+        canvas.itemconfigure(self.overlay_id, text="\n".join(lines))
+        canvas.tag_raise(self.overlay_id)
+
+    def toggle_overlay(self, event=None):
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay: self.draw_overlay()
+        elif self.overlay_id is not None:
+            canvas.delete(self.overlay_id)
+            self.overlay_id = None
+
+    def export(self, game):
+        """Writes the current statistics to PROFILE_DIR/profile_<game>.json, if PROFILE_DIR is set."""
+        if not PROFILE_DIR: return
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(os.path.join(PROFILE_DIR, f"profile_{game}.json"), "w") as f:
+                json.dump(dict(self.summary(), game=game), f, indent=2)
+        except OSError:
+            pass # Profiling must never break the game
+
+profiler = Profiler()
+if canvas.mirror: clock.render_hooks.append(canvas.mirror.flush)
+
+class QualityGovernor:
+    """Trades visual detail for frame rate, watching the real interval between frames.
+
+    Every GOVERNOR_WINDOW frames it takes the median interval. Over
+    GOVERNOR_SLOW_MS drops a level at once; a level is only given back
+    after GOVERNOR_CALM_WINDOWS windows in a row under GOVERNOR_FAST_MS,
+    so it does not flap between the two. `quality` holds the settings of
+    the current level. Changes go through the input recorder like a key
+    press, so a replay makes them on the same ticks.
+    """
+
+    def __init__(self):
+        self.level = 0
+        self.samples = []
+        self.calm = 0
+        self.changes = [] # (tick, level, median frame ms) per change
+        self.change = inputs.wrap("governor", "<Quality>", lambda e: self.set_level(e.x, e.y))
+
+    def sample(self, ms):
+        self.samples.append(ms)
+        if len(self.samples) < GOVERNOR_WINDOW: return
+        median = round(percentile(self.samples, 50), 1)
+        self.samples.clear()
+        if median > GOVERNOR_SLOW_MS:
+            self.calm = 0
+            if self.level < len(QUALITY_LEVELS) - 1: self.change(SimpleNamespace(x=self.level + 1, y=median))
+        elif median < GOVERNOR_FAST_MS and self.level > 0:
+            self.calm += 1
+            if self.calm >= GOVERNOR_CALM_WINDOWS:
+                self.calm = 0
+                self.change(SimpleNamespace(x=self.level - 1, y=median))
+        else:
+            self.calm = 0
+
+    def set_level(self, level, median_ms=0):
+        global quality
+        if level == self.level: return
+        # Always logged, on stderr so a run's JSON on stdout stays clean; --verbose adds why and what changed
+        detail = f" (median frame {median_ms} ms: {QUALITY_LEVELS[level]})" if VERBOSE else ""
+        print(f"Quality level {self.level} -> {level}{detail}", file=sys.stderr)
+        self.changes.append((clock.sim_ms // TICK_MS, level, median_ms))
+        self.level, quality = level, QUALITY_LEVELS[level]
+        show_clouds()
+        set_cloud_pace(cloud_pace) # New drift period
+
+quality = QUALITY_LEVELS[0]
+governor = QualityGovernor()
 
 
 # ---------- Utility ----------
 def clear_game_tags():
     global score, score_text_id, ui_buttons, menu_items, menu_selection, is_game_over
     is_game_over = False # Reset game over flag
-    for aid in after_ids:
-        try: root.after_cancel(aid)
-        except: pass
-    after_ids.clear()
+    clock.cancel()
     for item in canvas.find_all():
         # Clouds are persistent, but other items should be cleared
         if "cloud" not in canvas.gettags(item): canvas.delete(item)
+    particles.clear() # Their items went with everything else above
+    profiler.reset()
+    for pool in pools.values(): pool.reset()
     score, score_text_id = 0, None
     reset_game_vars()
     destroy_menu_buttons() # Ensure all UI buttons (including in-game menu button) are destroyed
@@ -104,18 +983,25 @@ def clear_game_tags():
 
 
 def reset_game_vars():
-    global asteroids, bullets, ship_id, buildings, plane_id
-    global paddle_id, ball_pairs, brick_ids, clickbtn_id
-    global snake_cells, food_pos, snake_dir, click_count
+    global asteroids, bullets, ship_id, plane_id, terrain, camera, plane_pos
+    global paddle_id, balls, powerups, brick_grid, bricks_left, clickbtn_id
+    global snake, snake_dir, snake_items, food_id, click_count
     global flight_speed, hud_text, enemies, enemy_bullets, pbot_bullets
-    global clicker_timer, is_cockpit_view, cockpit_ids, pbots
-    global draw_color, draw_size, frames, current_frame_index, animation_running
+    global clicker_timer, is_cockpit_view, cockpit_ids, pbots, ep_grid
+    global draw_color, draw_size, frames, current_frame_index, animation_running, stroke, ink_raster
+    global anim_items, anim_shown, next_shape_id, anim_base, frame_deltas
+    global anim_fps, anim_ease, anim_keyframe_ms, anim_elapsed, anim_moved, frame_tweens, anim_export
     
-    asteroids, bullets, buildings, ball_pairs, brick_ids = [], [], [], [], []
-    enemies, enemy_bullets, pbot_bullets = [], [], []
+    asteroids, brick_grid, bricks_left = [], [], 0
+    terrain, camera, plane_pos = None, None, None
+    balls, powerups = BallBatch(pools["oval"]), BodyBatch(pools["rectangle"])
+    enemies, pbot_bullets = [], []
+    bullets, enemy_bullets = BodyBatch(pools["rectangle"]), BodyBatch(pools["rectangle"])
     pbots = []
+    ep_grid = SpatialHash()
     ship_id = plane_id = paddle_id = clickbtn_id = None
-    snake_cells, food_pos, snake_dir = [], None, (1,0)
+    snake, snake_dir = None, (1,0)
+    snake_items, food_id = deque(), None
     click_count, flight_speed, hud_text = 0, 6, None
     
     clicker_timer = 0
@@ -125,9 +1011,17 @@ def reset_game_vars():
     # Reset Drawing/Animation
     draw_color = "black"
     draw_size = 5
+    stroke, ink_raster = None, None
+    close_project()
     frames = []
     current_frame_index = 0
     animation_running = False
+    anim_items, anim_shown, next_shape_id = {}, {}, 1
+    anim_base, frame_deltas = None, {}
+    anim_fps, anim_ease, anim_keyframe_ms, anim_elapsed = 20, "linear", KEYFRAME_MS, 0
+    anim_moved, frame_tweens = set(), {}
+    if anim_export: anim_export.cancel() # Leaving the studio abandons an export under way
+    anim_export = None
 
 
 def to_menu(event=None):
@@ -145,65 +1039,93 @@ def destroy_menu_buttons():
 
 # ---------- Clouds (Horizontal Drift) ----------
 def spawn_clouds():
-    global cloud_ids, cloud_data
-    
-    for c in cloud_ids: canvas.delete(c)
-    cloud_ids.clear()
+    canvas.delete("cloud") # Bodies and shadows alike
     cloud_data.clear()
     
     for i in range(CLOUD_COUNT):
-        x = random.uniform(0, WIDTH)
-        y = random.uniform(50, HEIGHT - 100)
-        
-        w, h = random.randint(50, 100), random.randint(15, 35)
-        # Create cloud with a slight gray bottom for depth
-        cid = canvas.create_oval(x-w/2, y-h/2, x+w/2, y+h/2, fill="white", outline="", tags=("cloud",))
-        canvas.create_oval(x-w/2, y+h/4, x+w/2, y+h/2 + 5, fill="#e0e0e0", outline="", tags=("cloud",))
+        x = scenery_rng.uniform(0, WIDTH)
+        y = scenery_rng.uniform(50, HEIGHT - 100)
         
-        cloud_ids.append(cid)
-        canvas.tag_lower(cid)
+        w, h = scenery_rng.randint(50, 100), scenery_rng.randint(15, 35)
+        # Each cloud is a white body over a slightly gray bottom for depth, grouped by one tag
+        group = f"cloud{i}"
+        body = canvas.create_oval(x-w/2, y-h/2, x+w/2, y+h/2, fill="white", outline="", tags=("cloud", group))
+        shadow = canvas.create_oval(x-w/2, y+h/4, x+w/2, y+h/2 + 5, fill="#e0e0e0", outline="", tags=("cloud", group))
+        canvas.tag_lower(group)
         
         cloud_data.append({
-            'id': cid,
-            'speed': random.uniform(-0.5, -2.5),
-            'w': w, 'h': h
+            'ids': (body, shadow),
+            'x': x, 'y': y,
+            'speed': scenery_rng.uniform(-0.5, -2.5),
+            'w': w, 'h': h, 'shown': True
         })
+    show_clouds()
+
+def cloud_quota():
+    """How many clouds the quality level shows; the rest are hidden and not moved."""
+    return round(CLOUD_COUNT * quality['clouds'])
+
+def show_clouds():
+    quota = cloud_quota()
+    for k, c in enumerate(cloud_data):
+        if c['shown'] != (k < quota):
+            c['shown'] = k < quota
+            for item in c['ids']: canvas.itemconfigure(item, state="normal" if c['shown'] else "hidden")
+
+def cloud_period():
+    """Cloud drift period for the window state and quality level."""
+    period = CLOUD_TICK_MS * quality['cloud_every']
+    return period if cloud_pace == "focused" else max(period, CLOUD_IDLE_TICK_MS)
+
+def draw_clouds():
+    """Pushes every cloud's position to the canvas in one batch."""
+    ids, rows = [], []
+    for c in cloud_data[:cloud_quota()]:
+        x, y, w, h = c['x'], c['y'], c['w'], c['h']
+        ids.extend(c['ids'])
+        rows.append([x-w/2, y-h/2, x+w/2, y+h/2])
+        rows.append([x-w/2, y+h/4, x+w/2, y+h/2 + 5])
+    canvas.set_coords(ids, rows)
 
 def animate_clouds_loop():
-    global cloud_data
+    if cloud_pace == "hidden": return # Nobody can see them
+    step = cloud_period() / CLOUD_TICK_MS # Fewer, longer steps when slowed, at the same speed
     
-    for data in list(cloud_data):
-        try:
-            cloud_id = data['id']
-            # Move all canvas items associated with this cloud_id tag
-            items_to_move = canvas.find_withtag(cloud_id)
-            if not items_to_move:
-                cloud_data.remove(data)
-                continue
-
-            # Move all parts of the cloud
-            canvas.move(cloud_id, data['speed'], 0)
-            
-            bbox = canvas.bbox(cloud_id)
-            if not bbox:
-                cloud_data.remove(data)
-                continue
-            
-            if bbox[2] < 0:
-                reset_x = WIDTH + 10
-                dx_reset = reset_x - bbox[0]
-                new_y = random.uniform(50, HEIGHT - 100)
-                dy_reset = new_y - bbox[1]
-
-                # Move all items with the same tag ("cloud") associated with this ID
-                canvas.move(cloud_id, dx_reset, dy_reset)
-                
-        except tk.TclError:
-            if data in cloud_data:
-                cloud_data.remove(data)
-
-    aid = root.after(50, animate_clouds_loop)
-    after_ids.append(aid)
+    # Clouds whose items went with a canvas clear are dropped
+    cloud_data[:] = [c for c in cloud_data if c['ids'][0] in canvas.items]
+    for c in cloud_data[:cloud_quota()]:
+        c['x'] += c['speed'] * step
+        if c['x'] + c['w'] / 2 < 0:
+            # Off the left edge: re-enter from the right at a new height
+            c['x'] = WIDTH + 10 + c['w'] / 2
+            c['y'] = scenery_rng.uniform(50, HEIGHT - 100) + c['h'] / 2
+    draw_clouds()
+
+def start_clouds_loop():
+    """(Re)registers the cloud drift with the clock, replacing any running one."""
+    clock.cancel("clouds")
+    clock.every(cloud_period(), animate_clouds_loop, group="clouds")
+
+def set_cloud_pace(pace):
+    """Full cloud rate with focus (as far as the quality level allows), a slow one without, and none while hidden."""
+    global cloud_pace
+    cloud_pace = pace
+    for task in clock.live("clouds"):
+        task['period'] = cloud_period()
+
+def window_changed(event, visible=None, focused=None):
+    global window_visible, window_focused
+    if visible is not None:
+        if event.widget is not root: return # Child widgets map and unmap as well
+        window_visible = visible
+    if focused is not None: window_focused = focused
+    set_cloud_pace("hidden" if not window_visible else "focused" if window_focused else "unfocused")
+
+def watch_window():
+    root.bind("<Map>", lambda e: window_changed(e, visible=True))
+    root.bind("<Unmap>", lambda e: window_changed(e, visible=False))
+    root.bind("<FocusIn>", lambda e: window_changed(e, focused=True))
+    root.bind("<FocusOut>", lambda e: window_changed(e, focused=False))
 
 # ---------- Score & Menu Button (Top Right) ----------
 def init_score():
@@ -213,10 +1135,16 @@ def init_score():
     score_text_id = canvas.create_text(WIDTH - 10, 20, text="Score: 0", font=("Arial", 12, "bold"), fill="black", tags=("score",), anchor="e")
     
     # 2. Add a persistent Menu button that triggers save_highscore() on click
-    b = tk.Button(root, text="Menu", command=lambda: (save_highscore(state), to_menu()), bg="lightgray", fg="black", font=("Arial", 10))
+    b = make_button(text="Menu", command=leave_game, bg="lightgray", fg="black", font=("Arial", 10))
     canvas.create_window(WIDTH - 40, 45, window=b, tags=("in_game_button",))
     ui_buttons.append(b)
 
+def leave_game():
+    """The in-game Menu button: saves the score to its game's table (stress mode keeps none) and returns to the menu."""
+    if state == "earthprotector": save_highscore(ep_mode)
+    elif not (state == "breakout" and breakout_stress): save_highscore(state)
+    to_menu()
+
 def add_score(points=1):
     global score
     score += points
@@ -229,6 +1157,7 @@ def add_score(points=1):
 
 def save_highscore(game):
     global high_scores, score
+    profiler.export(game) # Every game calls this when it ends
     if score > high_scores.get(game,0):
         high_scores[game] = score; save_highscores_file()
 
@@ -249,6 +1178,7 @@ def _display_main_menu():
     # Display high scores and map keys to readable names
     game_map = {
         "earthprotector": "Earth Protector",
+        "earthprotector-swarm": "Earth Protector Swarm",
         "flight": "Flight Simulator",
         "clicker": "Click Clicker",
         "breakout": "Breakout",
@@ -258,13 +1188,13 @@ def _display_main_menu():
     }
     
     # Order the display
-    display_order = ["earthprotector", "flight", "clicker", "breakout", "snake", "drawing", "animation"]
+    display_order = ["earthprotector", "earthprotector-swarm", "flight", "clicker", "breakout", "snake", "drawing", "animation"]
     
     for key in display_order:
         if key in display_scores:
             display_name = game_map.get(key, key.title())
             canvas.create_text(WIDTH//2,y,text=f"{display_name} High Score: {display_scores[key]}",font=("Arial",11),fill="black",tags=("menu_text",))
-            y+=18
+            y+=16 # Room for every table above the buttons
 
     # Menu items setup
     items=[("Earth Protector",start_asteroid),
@@ -284,7 +1214,7 @@ def _display_main_menu():
     for t,c in items:
         # Create a button on the canvas
         # Use relief=flat initially, we will change its background color to highlight
-        b=tk.Button(root,text=t,command=lambda cc=c:menu_button_pressed(cc),bg="white",fg="black",font=("Arial",11), relief=tk.FLAT)
+        b=make_button(text=t,command=lambda cc=c:menu_button_pressed(cc),bg="white",fg="black",font=("Arial",11), relief=tk.FLAT)
         ui_buttons.append(b)
         window_id = canvas.create_window(WIDTH//2,y,window=b, tags=("menu_button",))
         
@@ -300,7 +1230,8 @@ def _display_main_menu():
     root.bind("<Down>", navigate_menu)
     root.bind("<Return>", select_menu_item)
     root.bind("<Escape>",lambda e:None)
-    animate_clouds_loop()
+    root.bind("<F3>", profiler.toggle_overlay) # Stays bound in every mode
+    start_clouds_loop()
 
 
 def navigate_menu(event):
@@ -355,8 +1286,7 @@ def show_welcome_screen():
                         fill="black",
                         tags=("welcome_text",))
                         
-    aid = root.after(3000, _display_main_menu)
-    after_ids.append(aid)
+    clock.after(3000, _display_main_menu)
 
 def show_menu(event=None):
     global state, is_first_start
@@ -373,40 +1303,309 @@ def reset_highscores():
     high_scores={k:0 for k in high_scores}; save_highscores_file(); show_menu()
 
 # ---------- Helpers ----------
-def collide_by_id(a_id,b_id):
-    try:
-        a,b=canvas.bbox(a_id),canvas.bbox(b_id)
-        if not a or not b: return False
-        return a[0]<b[2] and a[2]>b[0] and a[1]<b[3] and a[3]>b[1]
-    except: return False
+class SpatialHash:
+    """Uniform-grid broad phase for axis-aligned boxes.
+
+    Each key (a canvas item id) is filed under every cell its cached bbox
+    touches, together with a group name ("asteroid", "pbot", ...). update()
+    only re-files a key when it crosses into different cells, and query()
+    only looks at the keys sharing cells with the box asked about.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {} # (cx, cy) -> set of keys
+        self.boxes = {} # key -> cached bbox
+        self.spans = {} # key -> (cx0, cy0, cx1, cy1) cells covered
+        self.groups = {} # key -> group name
+
+    def _span(self, box):
+        cs = self.cell_size
+        return (int(box[0] // cs), int(box[1] // cs), int(box[2] // cs), int(box[3] // cs))
+
+    def _unfile(self, key, span):
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                cell = self.cells[(cx, cy)]
+                cell.discard(key)
+                if not cell: del self.cells[(cx, cy)]
+
+    def update(self, key, box, group=None):
+        """Inserts key or records its new box; a None box removes it."""
+        if box is None:
+            self.remove(key); return
+        if group is not None: self.groups[key] = group
+        self.boxes[key] = box
+        span = self._span(box)
+        old = self.spans.get(key)
+        if span == old: return
+        if old: self._unfile(key, old)
+        self.spans[key] = span
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                self.cells.setdefault((cx, cy), set()).add(key)
+
+    def remove(self, key):
+        span = self.spans.pop(key, None)
+        if span: self._unfile(key, span)
+        self.boxes.pop(key, None)
+        self.groups.pop(key, None)
+
+    def query(self, box, group=None):
+        """Keys (only those in group, if given) whose cached box overlaps box."""
+        found = set()
+        cx0, cy0, cx1, cy1 = self._span(box)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell: found.update(cell)
+        boxes, groups = self.boxes, self.groups
+        return {k for k in found if (group is None or groups[k] == group) and boxes_overlap(boxes[k], box)}
+
+    def first_hit(self, box, group):
+        """Oldest (lowest id) key of group overlapping box, or None."""
+        best = None
+        boxes, groups, cells = self.boxes, self.groups, self.cells
+        cx0, cy0, cx1, cy1 = self._span(box)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for k in cells.get((cx, cy), ()):
+                    if (best is None or k < best) and groups[k] == group and boxes_overlap(boxes[k], box):
+                        best = k
+        return best
+
+    def hits(self, a, b):
+        """Narrow phase on the cached boxes, same test as collide_by_id."""
+        box_a, box_b = self.boxes.get(a), self.boxes.get(b)
+        return bool(box_a and box_b) and boxes_overlap(box_a, box_b)
+
+def boxes_overlap(a, b):
+    return a[0]<b[2] and a[2]>b[0] and a[1]<b[3] and a[3]>b[1]
+
+def sweep_box(box, dx, dy, target):
+    """Swept test of box moving by (dx, dy) against a still target box.
+
+    Returns (t, axis) for the first contact, t being the fraction of the move
+    done (0..1) and axis "x" or "y" the one whose faces met, i.e. the velocity
+    component to reflect; None when they never touch during the move.
+    """
+    entry, exit_ = [], []
+    for d, lo, hi, tlo, thi in ((dx, box[0], box[2], target[0], target[2]), (dy, box[1], box[3], target[1], target[3])):
+        if d > 0:
+            entry.append((tlo - hi) / d); exit_.append((thi - lo) / d)
+        elif d < 0:
+            entry.append((thi - lo) / d); exit_.append((tlo - hi) / d)
+        elif hi <= tlo or lo >= thi:
+            return None # Not moving on this axis and apart on it
+        else:
+            entry.append(-math.inf); exit_.append(math.inf)
+    t_in, t_out = max(entry), min(exit_)
+    if t_in > t_out or t_out <= 0 or t_in > 1: return None
+    return max(t_in, 0.0), "x" if entry[0] > entry[1] else "y"
 
 def move_safe(item,dx,dy):
     if item and (isinstance(item, int) and canvas.type(item)) or isinstance(item, str):
         canvas.move(item,dx,dy)
 
+class CanvasPool:
+    """Recycles canvas items of one shape type instead of deleting and recreating them.
+
+    release() hides an item and keeps it; acquire() shows a free one again
+    with new coords, changing only the options that differ, and raises it
+    so it stacks like a newly created item would. `high_water` is
+    the most items this pool had out at once, which is what a game needs
+    to size it.
+    """
+    DEFAULTS = {"fill": "", "outline": "black", "width": 1}
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.reset()
+
+    def reset(self):
+        """Forgets every item (call after they have been deleted from the canvas)."""
+        self.free, self.live = [], set()
+        self.created = self.reused = self.high_water = 0
+
+    def acquire(self, *coords, **options):
+        if not self.free:
+            item = getattr(canvas, "create_" + self.kind)(*coords, **options)
+            self.created += 1
+        else:
+            item = self.free.pop()
+            self.reused += 1
+            tags = options.pop("tags", ())
+            current = canvas.items[item].options
+            changes = {k: v for k, v in options.items() if current.get(k, self.DEFAULTS.get(k)) != v}
+            for k in current:
+                if k not in options and k != "state" and current[k] != self.DEFAULTS.get(k):
+                    changes[k] = self.DEFAULTS.get(k, "")
+            if tuple(tags) != canvas.gettags(item): changes["tags"] = tags
+            canvas.itemconfigure(item, state="normal", **changes)
+            canvas.coords(item, *coords)
+            canvas.tag_raise(item)
+        self.live.add(item)
+        self.high_water = max(self.high_water, len(self.live))
+        return item
+
+    def release(self, item):
+        self.live.discard(item)
+        self.free.append(item)
+        # Drop the tags too, so tag lookups such as find_withtag("enemy") skip it
+        canvas.itemconfigure(item, state="hidden", tags=())
+
+    def stats(self):
+        return {'live': len(self.live), 'free': len(self.free), 'high_water': self.high_water,
+                'created': self.created, 'reused': self.reused}
+
+pools = {"oval": CanvasPool("oval"), "rectangle": CanvasPool("rectangle")}
+
+def release_item(item):
+    """Returns a pooled item to its pool, or deletes an item that was never pooled."""
+    for pool in pools.values():
+        if item in pool.live:
+            pool.release(item); return
+    canvas.delete(item)
+
+
+class BodyBatch:
+    """Canvas items moving in straight lines, kept in parallel columns.
+
+    Every column (x, y, w, h, vx, vy, plus any a subclass adds) is a NumPy
+    array when NumPy is installed and a plain list otherwise, and step()
+    integrates all bodies at once. New bodies wait in `pending` and are
+    merged at the start of the next step, so a burst of spawns costs one
+    concatenate rather than one per body.
+    """
+    FIELDS = ("x", "y", "w", "h", "vx", "vy")
+
+    def __init__(self, pool=None):
+        self.pool = pool # CanvasPool the bodies' items came from, if any
+        self.clear()
+
+    def clear(self):
+        """Forgets every body (their canvas items are left alone)."""
+        self.ids = []
+        self.cols = {f: (np.zeros(0) if np is not None else []) for f in self.FIELDS}
+        self.pending = []
+
+    def __len__(self):
+        return len(self.ids) + len(self.pending)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def add(self, item, *values):
+        """Adds a body; values follow FIELDS (x, y are the top-left corner)."""
+        self.pending.append((item, values))
+
+    def _merge(self):
+        if not self.pending: return
+        self.ids.extend(item for item, _ in self.pending)
+        for k, f in enumerate(self.FIELDS):
+            new = [values[k] for _, values in self.pending]
+            if np is not None: self.cols[f] = np.concatenate((self.cols[f], np.array(new, dtype=float)))
+            else: self.cols[f].extend(new)
+        self.pending.clear()
+
+    def _keep(self, mask):
+        """Drops every body whose mask entry is false and returns their ids."""
+        dropped = [i for i, keep in zip(self.ids, mask) if not keep]
+        if dropped:
+            self.ids = [i for i, keep in zip(self.ids, mask) if keep]
+            for f, col in self.cols.items():
+                if np is not None: self.cols[f] = col[np.asarray(mask, dtype=bool)]
+                else: self.cols[f] = [v for v, keep in zip(col, mask) if keep]
+        return dropped
+
+    def discard(self, items):
+        """Removes the given bodies in one pass and releases (or deletes) their canvas items."""
+        if not items: return
+        self.pending = [p for p in self.pending if p[0] not in items]
+        self._keep([i not in items for i in self.ids])
+        self._drop(items)
+
+    def _drop(self, items):
+        if self.pool is None:
+            canvas.delete(*items)
+        else:
+            for item in items: self.pool.release(item)
+
+    def integrate(self):
+        c = self.cols
+        if np is not None:
+            c["x"] += c["vx"]
+            c["y"] += c["vy"]
+        else:
+            c["x"] = [x + vx for x, vx in zip(c["x"], c["vx"])]
+            c["y"] = [y + vy for y, vy in zip(c["y"], c["vy"])]
+
+    def boxes(self):
+        """[x1, y1, x2, y2] of every merged body, in `ids` order."""
+        c = self.cols
+        if np is not None:
+            return np.column_stack((c["x"], c["y"], c["x"] + c["w"], c["y"] + c["h"])).tolist()
+        return [[x, y, x + w, y + h] for x, y, w, h in zip(c["x"], c["y"], c["w"], c["h"])]
+
+    def step(self):
+        """Moves every body one step, pushes the new boxes to the canvas and returns them."""
+        self._merge()
+        self.integrate()
+        rows = self.boxes()
+        canvas.set_coords(self.ids, rows)
+        return rows
+
+
+class ParticleSystem(BodyBatch):
+    """Short-lived effect particles, all advanced by one clock task every 50 ms."""
+    FIELDS = BodyBatch.FIELDS + ("life",)
+
+    def __init__(self):
+        super().__init__(pools["oval"])
+        self.task = None
+
+    def emit(self, x, y, size, dx, dy, life, color):
+        p = self.pool.acquire(x, y, x + size, y + size, fill=color, outline="")
+        self.add(p, x, y, size, size, dx, dy, life)
+        if self.task is None or not self.task['alive']:
+            self.task = clock.every(50, self.step, group="particles")
+
+    def step(self):
+        self._merge()
+        # A particle moves `life` times, then disappears on the step after
+        self._drop(self._keep([life > 0 for life in self.cols["life"]]))
+        if not self.ids: return False
+        super().integrate()
+        c = self.cols
+        if np is not None: c["life"] -= 1
+        else: c["life"] = [life - 1 for life in c["life"]]
+        rows = self.boxes()
+        canvas.set_coords(self.ids, rows)
+        return rows
+
+particles = ParticleSystem()
+
 def spawn_particles(x,y,color="orange"):
-    for _ in range(6):
-        dx,dy=random.randint(-3,3),random.randint(-3,3)
-        p=canvas.create_oval(x,y,x+4,y+4,fill=color,outline="")
-        animate_particle(p,dx,dy,8)
+    for _ in range(max(1, round(6 * quality['particles']))):
+        dx,dy=rng.randint(-3,3),rng.randint(-3,3)
+        particles.emit(x, y, 4, dx, dy, 8, color)
 
 def large_explosion(x, y):
-    for _ in range(40):
-        size = random.randint(5, 12)
-        dx = uniform(-10, 10)
-        dy = uniform(-10, 5)
-        color = random.choice(["red", "orange", "yellow"])
-        p = canvas.create_oval(x - size/2, y - size/2, x + size/2, y + size/2, fill=color, outline="")
-        animate_particle(p, dx, dy, 15)
-
-def animate_particle(p,dx,dy,life):
-    if life<=0: canvas.delete(p); return
-    canvas.move(p,dx,dy); root.after(50,lambda:animate_particle(p,dx,dy,life-1))
+    for _ in range(max(1, round(40 * quality['particles']))):
+        size = rng.randint(5, 12)
+        dx = rng.uniform(-10, 10)
+        dy = rng.uniform(-10, 5)
+        color = rng.choice(["red", "orange", "yellow"])
+        particles.emit(x - size/2, y - size/2, size, dx, dy, 15, color)
 
 # ---------- Game 1: Earth Protector ----------
-def start_asteroid():
-    global state,ship_id, pbots
+SWARM_PBOTS = 50 # P-Bots in swarm mode (--pbots N)
+
+def start_asteroid(pbot_count=2):
+    """Starts Earth Protector with pbot_count P-Bots; any count but the usual two is swarm mode."""
+    global state,ship_id, pbots, ep_mode
     state="earthprotector"; clear_game_tags(); spawn_clouds()
+    ep_mode = "earthprotector" if pbot_count == 2 else "earthprotector-swarm" # High score table
     
     # Ground Rectangle
     canvas.create_rectangle(0, HEIGHT - 30, WIDTH, HEIGHT, fill="#38761d", outline="", tags=("ground",))
@@ -415,11 +1614,15 @@ def start_asteroid():
     ship_id=canvas.create_polygon(WIDTH//2,HEIGHT-90,WIDTH//2 - 16,HEIGHT-60,WIDTH//2 + 16,HEIGHT-60,fill=ACCENT, tags=("ship",))
     ship_label_id = canvas.create_text(WIDTH//2, HEIGHT - 100, text="Player Guard", fill="white", font=("Arial", 9, "bold"), tags=("ship_label",))
 
-    # Two AI defense units (P-Bots, all labeled Guard)
-    pbot_configs = [
-        {"label": "Guard L", "offset": -150, "color": "darkgreen"},
-        {"label": "Guard R", "offset": 150, "color": "darkblue"},
-    ]
+    # AI defense units (P-Bots, all labeled Guard): two flanking the ship, or a swarm spread evenly
+    if pbot_count == 2:
+        pbot_configs = [
+            {"label": "Guard L", "offset": -150, "color": "darkgreen"},
+            {"label": "Guard R", "offset": 150, "color": "darkblue"},
+        ]
+    else:
+        pbot_configs = [{"label": f"Guard {k + 1}", "offset": (k + 1) * WIDTH // (pbot_count + 1) - WIDTH // 2,
+                         "color": ("darkgreen", "darkblue")[k % 2]} for k in range(pbot_count)]
 
     pbots = []
     for config in pbot_configs:
@@ -438,35 +1641,93 @@ def start_asteroid():
             'dx': 0,
             'label': config['label']
         })
+        ep_track(p_id, "pbot")
+    ep_track(ship_id, "ship")
     
-    root.bind("<Left>",lambda e:(move_safe(ship_id,-20,0), move_safe(ship_label_id,-20,0)))
-    root.bind("<Right>",lambda e:(move_safe(ship_id,20,0), move_safe(ship_label_id,20,0)))
+    root.bind("<Left>",lambda e:move_ship(-20))
+    root.bind("<Right>",lambda e:move_ship(20))
     root.bind("<space>",asteroid_shoot)
-    root.bind("<Escape>",lambda e:(save_highscore("earthprotector"),to_menu()))
+    root.bind("<Escape>",lambda e:(save_highscore(ep_mode),to_menu()))
     
-    init_score(); asteroid_spawn_loop(); asteroid_update_loop(); animate_clouds_loop()
+    init_score()
+    clock.every(300, asteroid_spawn_loop)
+    clock.every(30, asteroid_update_loop)
+    start_clouds_loop()
+
+def ep_track(item, group):
+    """Files an Earth Protector item's current bbox in the collision grid."""
+    ep_grid.update(item, canvas.bbox(item), group)
+
+def ep_discard(item, item_list=None):
+    """Deletes an item from the canvas, the collision grid and (optionally) its list."""
+    release_item(item); ep_grid.remove(item)
+    if item_list is not None: item_list.remove(item)
+
+def ep_pbot_hit(box):
+    """The first P-Bot whose box overlaps box, or None."""
+    pid = ep_grid.first_hit(box, "pbot")
+    if pid is None: return None
+    for pbot in pbots:
+        if pbot['id'] == pid: return pbot
+
+def destroy_pbot(pbot):
+    spawn_particles(*canvas.coords(pbot['id'])[:2], color="green")
+    ep_discard(pbot['id']); canvas.delete(pbot['label_id'])
+    pbots.remove(pbot); add_score(50)
+
+def move_ship(dx):
+    move_safe(ship_id,dx,0); move_safe("ship_label",dx,0)
+    if ship_id: ep_track(ship_id, "ship")
 
 def asteroid_shoot(e=None):
-    if not ship_id: return
+    if not ship_id or not canvas.bbox(ship_id): return # No ship, or it has been destroyed
     x1,y1,x2,y2=canvas.bbox(ship_id); bx=(x1+x2)//2
-    b=canvas.create_rectangle(bx-2,y1-15,bx+2,y1,fill="yellow"); bullets.append(b)
+    b=pools["rectangle"].acquire(bx-2,y1-15,bx+2,y1,fill="yellow"); bullets.add(b, bx-2, y1-15, 4, 15, 0, -18)
+    ep_track(b, "bullet")
 
 def asteroid_spawn_loop():
-    if state!="earthprotector": return
-    
+    if state!="earthprotector" or is_game_over: return False # Nothing moves asteroids after game over
+    with profiler.phase("spawning"):
+        _asteroid_spawn()
+
+def _asteroid_spawn():
     # Asteroid spawn
-    if random.random()<0.15:
-        s=random.randint(20,40);x=random.randint(0,WIDTH-s)
-        a=canvas.create_oval(x,-s,x+s,0,fill="darkgray"); asteroids.append(a)
+    if rng.random()<0.15*quality['spawn']:
+        s=rng.randint(20,40);x=rng.randint(0,WIDTH-s)
+        a=pools["oval"].acquire(x,-s,x+s,0,fill="darkgray"); asteroids.append(a)
+        ep_track(a, "asteroid")
         
     # Enemy ship spawn
-    if random.random()<0.03:
-        w,h=30,15;x=random.randint(50,WIDTH-50)
-        e=canvas.create_rectangle(x,-h,x+w,0,fill="blue",tags=("enemy",)); enemies.append(e)
+    if rng.random()<0.03*quality['spawn']:
+        w,h=30,15;x=rng.randint(50,WIDTH-50)
+        e=pools["rectangle"].acquire(x,-h,x+w,0,fill="blue",tags=("enemy",)); enemies.append(e)
+        ep_track(e, "enemy")
 
-    aid=root.after(300,asteroid_spawn_loop); after_ids.append(aid)
+class ThreatIndex:
+    """One tick's threats sorted by bottom edge, built once and queried by every P-Bot.
 
-def pbot_move_logic(pbot):
+    above(y) picks what a scan of asteroids + enemies would: the threat
+    whose bottom is closest above y, the first in that order on a tie.
+    """
+
+    def __init__(self, threats):
+        entries = []
+        for order, threat in enumerate(threats):
+            coords = canvas.coords(threat)
+            if not coords: continue
+            # Equal bottoms sort later-listed first, so bisecting lands on the earliest
+            entries.append((coords[3], -order, (coords[0] + coords[2]) // 2))
+        entries.sort()
+        self.bottoms = [e[0] for e in entries]
+        self.xs = [e[2] for e in entries]
+
+    def above(self, y):
+        """Centre x of the nearest threat wholly above y, or None."""
+        k = bisect_left(self.bottoms, y)
+        if k and y - self.bottoms[k - 1] < HEIGHT * 2: return self.xs[k - 1]
+        return None
+
+def pbot_move_logic(pbot, threats):
     if not pbot['id']: return
 
     try:
@@ -476,21 +1737,7 @@ def pbot_move_logic(pbot):
     except tk.TclError:
         return
 
-    closest_threat_x = None
-    min_dist_y = HEIGHT * 2
-
-    for threat in asteroids + enemies:
-        try:
-            coords = canvas.coords(threat)
-            if not coords: continue
-            tx = (coords[0] + coords[2]) // 2
-            if coords[3] < pbot_bbox[1]:
-                tdist_y = pbot_bbox[1] - coords[3]
-                if tdist_y < min_dist_y:
-                    min_dist_y = tdist_y
-                    closest_threat_x = tx
-        except tk.TclError:
-            continue
+    closest_threat_x = threats.above(pbot_bbox[1])
 
     current_dx = pbot.get('dx', 0)
     
@@ -502,8 +1749,8 @@ def pbot_move_logic(pbot):
         else:
             current_dx = 0
     
-    elif random.random() < 0.05:
-        current_dx = random.choice([-5, 0, 5])
+    elif rng.random() < 0.05:
+        current_dx = rng.choice([-5, 0, 5])
 
     pbot['dx'] = current_dx
 
@@ -522,175 +1769,334 @@ def pbot_move_logic(pbot):
             canvas.move(pbot['id'], dx_correct, 0)
             canvas.move(pbot['label_id'], dx_correct, 0)
             pbot['dx'] = -abs(pbot['dx'])
+    ep_track(pbot['id'], "pbot")
 
 def asteroid_update_loop():
     global pbots
     
-    if state!="earthprotector": return
+    if state!="earthprotector": return False
     
     # 1. P-Bot Movement Logic
-    for pbot in list(pbots):
-        pbot_move_logic(pbot)
+    with profiler.phase("ai"):
+        threats = ThreatIndex(asteroids + enemies)
+        for pbot in list(pbots):
+            pbot_move_logic(pbot, threats)
     
+    def destroy_unit(unit_id, label_tag, game_over_msg):
+        global is_game_over
+        is_game_over = True
+        large_explosion(*canvas.coords(unit_id)[:2])
+        save_highscore(ep_mode)
+        ep_discard(unit_id)
+        if label_tag: # Only try to delete label if a tag is provided (for ships/pbots)
+            # Delete the label using its ID, which is the first item in the tuple returned by find_withtag
+            label_id_tuple = canvas.find_withtag(label_tag)
+            if label_id_tuple:
+                canvas.delete(label_id_tuple[0])
+        canvas.create_text(WIDTH//2,HEIGHT//2,text=game_over_msg,font=("Arial",20),fill=ACCENT)
+
+    # Collisions below use the boxes cached in ep_grid: only objects sharing
+    # a grid cell are compared, and no test goes back to the canvas.
+
     # 2. Move Asteroids
-    for a in list(asteroids):
-        asteroid_deleted = False
-        
-        canvas.move(a,0,9)
-        
-        def destroy_unit(unit_id, label_tag, game_over_msg):
-            large_explosion(*canvas.coords(unit_id)[:2])
-            save_highscore("earthprotector")
-            canvas.delete(unit_id)
-            if label_tag: # Only try to delete label if a tag is provided (for ships/pbots)
-                # Delete the label using its ID, which is the first item in the tuple returned by find_withtag
-                label_id_tuple = canvas.find_withtag(label_tag)
-                if label_id_tuple:
-                    canvas.delete(label_id_tuple[0])
-            canvas.create_text(WIDTH//2,HEIGHT//2,text=game_over_msg,font=("Arial",20),fill=ACCENT)
-
-        # Ship collision
-        ship_label_id = canvas.find_withtag("ship_label")
-        if ship_id and collide_by_id(ship_id,a):
-            destroy_unit(ship_id, "ship_label", "Ship Destroyed!"); return
-
-        # Pbot collision
-        for pbot in list(pbots):
-            if collide_by_id(pbot['id'], a):
-                spawn_particles(*canvas.coords(pbot['id'])[:2], color="green")
-                canvas.delete(a); asteroids.remove(a)
-                canvas.delete(pbot['id']); canvas.delete(pbot['label_id'])
-                pbots.remove(pbot)
-                add_score(50); asteroid_deleted = True; break
-            
-        if asteroid_deleted: continue
+    with profiler.phase("movement"):
+        for a in asteroids:
+            canvas.move(a,0,9); ep_track(a, "asteroid")
+
+    with profiler.phase("collision"):
+        for a in list(asteroids):
+            box = ep_grid.boxes[a]
+
+            # Ship collision
+            if ship_id and ep_grid.hits(ship_id, a):
+                destroy_unit(ship_id, "ship_label", "Ship Destroyed!"); return False
+
+            # Pbot collision
+            pbot = ep_pbot_hit(box)
+            if pbot:
+                ep_discard(a, asteroids); destroy_pbot(pbot)
+                continue
 
-        # Ground collision
-        if canvas.coords(a)[3] >= HEIGHT - 30:
-            canvas.delete(a); asteroids.remove(a)
-            destroy_unit(ship_id, "ship_label", "Earth Destroyed!"); return # Game over if earth is hit
+            # Ground collision
+            if box[3] >= HEIGHT - 30:
+                ep_discard(a, asteroids)
+                destroy_unit(ship_id, "ship_label", "Earth Destroyed!"); return False # Game over if earth is hit
             
-    # 3. Move Player/Pbot Bullets and Check Collisions
-    for b in list(bullets):
-        canvas.move(b,0,-18)
-        if canvas.coords(b)[1]<0:
-            canvas.delete(b); bullets.remove(b); continue
-        
-        hit = False
-        for target_list in [asteroids, enemies]:
-            for target in list(target_list):
-                if collide_by_id(target,b):
+    # 3. Move Player/Pbot Bullets (one batched step) and Check Collisions
+    with profiler.phase("movement"):
+        rows = bullets.step()
+    with profiler.phase("collision"):
+        spent = set()
+        for b, c in zip(bullets.ids, rows):
+            if c[1]<0:
+                spent.add(b); continue
+            ep_track(b, "bullet")
+            
+            box = ep_grid.boxes[b]
+            for target_list, group, points in ((asteroids, "asteroid", 10), (enemies, "enemy", 20)):
+                target = ep_grid.first_hit(box, group)
+                if target is not None:
                     spawn_particles(*canvas.coords(target)[:2], color="orange")
-                    canvas.delete(target); target_list.remove(target); add_score(10 if target_list is asteroids else 20)
-                    hit = True; break
-            if hit: break
-        if hit:
-            canvas.delete(b); bullets.remove(b); continue
+                    ep_discard(target, target_list); add_score(points)
+                    spent.add(b)
+                    break
+        for b in spent: ep_grid.remove(b)
+        bullets.discard(spent)
     
     # 4. Friendly AI Shoot (P-Bot)
-    for pbot in list(pbots):
-        if random.random() < 0.1: # Increased AI shooting rate
-            try:
-                px1,py1,px2,py2=canvas.bbox(pbot['id']); pbx=(px1+px2)//2
-                pb=canvas.create_rectangle(pbx-2,py1-15,pbx+2,py1,fill="lime"); bullets.append(pb)
-            except tk.TclError: pass
+    with profiler.phase("spawning"):
+        for pbot in list(pbots):
+            if rng.random() < 0.1: # Increased AI shooting rate
+                try:
+                    px1,py1,px2,py2=canvas.bbox(pbot['id']); pbx=(px1+px2)//2
+                    pb=pools["rectangle"].acquire(pbx-2,py1-15,pbx+2,py1,fill="lime"); bullets.add(pb, pbx-2, py1-15, 4, 15, 0, -18)
+                    ep_track(pb, "bullet")
+                except tk.TclError: pass
 
     # 5. Move Enemies, Shoot, and Check Ship/Pbot Collision
-    for e in list(enemies):
-        enemy_deleted = False
-        canvas.move(e,0,4)
-        
-        # Enemy shooting logic
-        if ship_id and random.random() < 0.005:
-            ex1,ey1,ex2,ey2=canvas.bbox(e); ebx=(ex1+ex2)//2; eby=(ey1+ey2)//2
-            eb=canvas.create_rectangle(ebx-2,eby,ebx+2,eby+10,fill="magenta"); enemy_bullets.append(eb)
-
-        # Enemy collision with player ship
-        ship_label_id = canvas.find_withtag("ship_label")
-        if ship_id and collide_by_id(ship_id, e):
-            destroy_unit(ship_id, "ship_label", "Ship Destroyed!"); return
-
-        # Enemy collision with P-Bots
-        for pbot in list(pbots):
-            if collide_by_id(pbot['id'], e):
-                spawn_particles(*canvas.coords(pbot['id'])[:2], color="green")
-                canvas.delete(e); enemies.remove(e)
-                canvas.delete(pbot['id']); canvas.delete(pbot['label_id'])
-                pbots.remove(pbot); add_score(50); enemy_deleted = True; break
-        
-        if enemy_deleted: continue
-        if canvas.coords(e)[1]>HEIGHT: canvas.delete(e); enemies.remove(e)
-
-    # 6. Move Enemy Bullets and Check Ship/Pbot Collision
-    for eb in list(enemy_bullets):
-        canvas.move(eb,0,8)
-        if canvas.coords(eb)[3]>HEIGHT:
-            canvas.delete(eb); enemy_bullets.remove(eb); continue
-        
-        # Enemy Bullet vs Ship
-        ship_label_id = canvas.find_withtag("ship_label")
-        if ship_id and collide_by_id(ship_id, eb):
-            canvas.delete(eb); enemy_bullets.remove(eb)
-            destroy_unit(ship_id, "ship_label", "Ship Destroyed!"); return
+    with profiler.phase("movement"):
+        for e in enemies:
+            canvas.move(e,0,4); ep_track(e, "enemy")
+
+    with profiler.phase("collision"):
+        for e in list(enemies):
+            # Enemy shooting logic
+            if ship_id and rng.random() < 0.005:
+                ex1,ey1,ex2,ey2=canvas.bbox(e); ebx=(ex1+ex2)//2; eby=(ey1+ey2)//2
+                eb=pools["rectangle"].acquire(ebx-2,eby,ebx+2,eby+10,fill="magenta"); enemy_bullets.add(eb, ebx-2, eby, 4, 10, 0, 8)
+                ep_track(eb, "enemy_bullet")
+
+            # Enemy collision with player ship
+            if ship_id and ep_grid.hits(ship_id, e):
+                destroy_unit(ship_id, "ship_label", "Ship Destroyed!"); return False
+
+            # Enemy collision with P-Bots
+            pbot = ep_pbot_hit(ep_grid.boxes[e])
+            if pbot:
+                ep_discard(e, enemies); destroy_pbot(pbot)
+                continue
             
-        # Enemy Bullet vs Pbot
-        for pbot in list(pbots):
-            if collide_by_id(pbot['id'], eb):
-                canvas.delete(eb); enemy_bullets.remove(eb)
-                spawn_particles(*canvas.coords(pbot['id'])[:2], color="green")
-                canvas.delete(pbot['id']); canvas.delete(pbot['label_id'])
-                pbots.remove(pbot); add_score(50); break
-
-        # Enemy Bullet vs Ground
-        if canvas.coords(eb)[3] >= HEIGHT - 30:
-            spawn_particles(canvas.coords(eb)[0], HEIGHT - 30, color="gray")
-            canvas.delete(eb); enemy_bullets.remove(eb)
+            if canvas.coords(e)[1]>HEIGHT: ep_discard(e, enemies)
+
+    # 6. Move Enemy Bullets (one batched step) and Check Ship/Pbot Collision
+    with profiler.phase("movement"):
+        rows = enemy_bullets.step()
+    with profiler.phase("collision"):
+        spent = set()
+        for eb, c in zip(enemy_bullets.ids, rows):
+            if c[3]>HEIGHT:
+                spent.add(eb); continue
+            ep_track(eb, "enemy_bullet")
+            
+            # Enemy Bullet vs Ship
+            if ship_id and ep_grid.hits(ship_id, eb):
+                ep_grid.remove(eb); enemy_bullets.discard({eb})
+                destroy_unit(ship_id, "ship_label", "Ship Destroyed!"); return False
+                
+            # Enemy Bullet vs Pbot
+            pbot = ep_pbot_hit(ep_grid.boxes[eb])
+            if pbot:
+                spent.add(eb); destroy_pbot(pbot)
+                continue
 
-    aid=root.after(30,asteroid_update_loop); after_ids.append(aid)
+            # Enemy Bullet vs Ground
+            if c[3] >= HEIGHT - 30:
+                spawn_particles(c[0], HEIGHT - 30, color="gray")
+                spent.add(eb)
+        for eb in spent: ep_grid.remove(eb)
+        enemy_bullets.discard(spent)
 
 # ---------- Game 2: Flight Simulator (Textured & Cockpit Fix) ----------
 
+CHUNK_W = 600 # World width of one terrain chunk
+TERRAIN_CACHE_CHUNKS = 6 # Chunks kept around the camera; one dropped is rebuilt the same if revisited
+GROUND_SHADES = ("#38761d", "#3b7a1f", "#34701a", "#417f24")
+
+class Terrain:
+    """The Flight Simulator world, generated one CHUNK_W wide chunk at a time.
+
+    Chunk i covers world x [i * CHUNK_W, (i + 1) * CHUNK_W) and is built
+    from its own RNG seeded by (seed, i), so it comes out the same every
+    time. Built chunks sit in an LRU cache of TERRAIN_CACHE_CHUNKS, which
+    bounds memory however far the plane flies. The chunk just ahead of the
+    view is built on an idle callback so a frame rarely has to wait for one.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.chunks = OrderedDict() # index -> {ground, buildings}, least recently used first
+        self.drawn = set() # Indices of chunks that hold canvas items
+        self.queued = None # Index waiting for an idle callback
+        self.built = 0
+        self.scored_x = 0.0 # Buildings ending before this x have been scored
+
+    def chunk(self, i):
+        ch = self.chunks.get(i)
+        if ch is not None:
+            self.chunks.move_to_end(i)
+            return ch
+        ch = self.chunks[i] = self._build(i)
+        self.built += 1
+        while len(self.chunks) > TERRAIN_CACHE_CHUNKS:
+            j, old = self.chunks.popitem(last=False)
+            if j in self.drawn: self.hide(j, old)
+        return ch
+
+    def _build(self, i):
+        rand = random.Random(f"{self.seed}:{i}")
+        x0 = i * CHUNK_W
+        ground = {'box': (x0, HEIGHT - 50, x0 + CHUNK_W, HEIGHT * 2), 'fill': rand.choice(GROUND_SHADES), 'id': None}
+        buildings = []
+        # Chunk 0 is the open runway the plane starts over
+        x = x0 + rand.randint(10, 200)
+        while i > 0 and x + 52 < x0 + CHUNK_W:
+            w, h = rand.randint(30, 50), rand.randint(80, 160)
+            roof_h = h // 8
+            y_ground = HEIGHT - 50
+            buildings.append({'body': (x, y_ground - h, x + w, y_ground),
+                              'roof': (x - 2, y_ground - h - roof_h, x + w + 2, y_ground - h),
+                              'ids': None})
+            x += w + rand.randint(150, 400)
+        return {'ground': ground, 'buildings': buildings}
+
+    def span(self, x1, x2):
+        """Indices of the chunks that world x range [x1, x2] touches."""
+        return range(int(x1 // CHUNK_W), int(x2 // CHUNK_W) + 1)
+
+    def prefetch(self, i):
+        """Queues chunk i to be built on the clock's next pass, unless it is cached already."""
+        if i in self.chunks or self.queued is not None: return
+        self.queued = i
+        clock.after(0, self._build_queued, group="game") # Cancelled with the game, unlike root.after_idle
+
+    def _build_queued(self):
+        if self.queued is not None and terrain is self: self.chunk(self.queued)
+        self.queued = None
+
+    def hide(self, i, ch):
+        """Returns a chunk's canvas items to their pool."""
+        self.drawn.discard(i)
+        if ch['ground']['id'] is not None:
+            release_item(ch['ground']['id']); ch['ground']['id'] = None
+        for b in ch['buildings']:
+            if b['ids'] is not None:
+                for item in b['ids']: release_item(item)
+                b['ids'] = None
+
+class Camera:
+    """Viewport onto the Flight Simulator world: screen = world - (x, y).
+
+    Game code moves the camera, never the world's items. flight_render()
+    then places whatever is in view once per frame, in one batched coords
+    update, and hands items back to their pool as things leave the view.
+    """
+
+    def __init__(self):
+        self.x = self.y = 0.0
+        self.panned = [0.0, 0.0] # Cockpit panning the clouds have not followed yet
+        self.dirty = True # Something moved since the last render
+
+    def scroll(self, dx):
+        """Forward flight: the world streams past, the sky stays put."""
+        self.x += dx; self.dirty = True
+
+    def pan(self, dx, dy):
+        """Cockpit look: the camera follows the plane, clouds included."""
+        self.x += dx; self.y += dy
+        self.panned[0] += dx; self.panned[1] += dy
+        self.dirty = True
+
+    def view(self):
+        return (self.x, self.y, self.x + WIDTH, self.y + HEIGHT)
+
+    def to_screen(self, coords):
+        return [v - (self.y if k % 2 else self.x) for k, v in enumerate(coords)]
+
+def plane_points():
+    """The plane polygon, in world coords."""
+    x, y = plane_pos
+    return [x, y, x - 20, y - 10, x - 20, y + 10]
+
+def plane_box():
+    x, y = plane_pos
+    return (x - 20, y - 10, x, y + 10)
+
+def move_plane(dx, dy):
+    plane_pos[0] += dx; plane_pos[1] += dy
+    camera.dirty = True
+
 def handle_flight_input(dx, dy):
     """Handles plane movement input based on view mode."""
-    if state != "flight": return
-    global is_cockpit_view
+    if state != "flight" or not plane_id: return
     
-    # 1. Always move the invisible plane object for collision/altitude tracking
-    move_safe(plane_id, dx, dy)
-
-    if is_cockpit_view:
-        # 2. If in cockpit view, move the WORLD objects (buildings, clouds, ground)
-        # in the OPPOSITE direction of the control input.
-        
-        # Move Buildings (building structure is stored as a list of item IDs)
-        for b_list in buildings:
-            for b_id in b_list:
-                canvas.move(b_id, -dx, -dy)
-        
-        # Move Clouds
-        for c_data in cloud_data:
-            # Move the associated items (main cloud and shadow) by moving the ID
-            try:
-                if canvas.type(c_data['id']):
-                    canvas.move(c_data['id'], -dx, -dy)
-            except tk.TclError:
-                pass # Cloud might have been deleted/recreated during loop
-
-        
-        # Move Ground
-        canvas.move("ground", -dx, -dy)
+    # 1. Always move the plane (hidden in cockpit view) for collision/altitude tracking
+    move_plane(dx, dy)
+
+    # 2. In cockpit view the camera rides along, so buildings, clouds and ground
+    # shift the opposite way when the next frame is drawn
+    if is_cockpit_view: camera.pan(dx, dy)
+
+def flight_render():
+    """Draws the Flight world through the camera; only chunks and buildings in view hold canvas items."""
+    if state != "flight" or camera is None or not camera.dirty: return
+    camera.dirty = False
+    view = camera.view()
+    visible = terrain.span(view[0], view[2])
+    created = 0
+    for i in terrain.drawn - set(visible):
+        if i in terrain.chunks: terrain.hide(i, terrain.chunks[i])
+        else: terrain.drawn.discard(i)
+    ids, rows = [], []
+    for i in visible:
+        ch = terrain.chunk(i)
+        terrain.drawn.add(i)
+        ground = ch['ground']
+        if ground['id'] is None:
+            ground['id'] = pools["rectangle"].acquire(*camera.to_screen(ground['box']), fill=ground['fill'], outline="#1e4600", tags=("ground",))
+            created += 1
+        else:
+            ids.append(ground['id']); rows.append(camera.to_screen(ground['box']))
+        for b in ch['buildings']:
+            if boxes_overlap(b['roof'], view) or boxes_overlap(b['body'], view):
+                body, roof = camera.to_screen(b['body']), camera.to_screen(b['roof'])
+                if b['ids'] is None:
+                    b['ids'] = (pools["rectangle"].acquire(*body, fill="#5e5e5e", outline="#333", width=1),
+                                pools["rectangle"].acquire(*roof, fill="#a64d79", outline="#772b52"))
+                    created += 1
+                else:
+                    ids.extend(b['ids']); rows.extend((body, roof))
+            elif b['ids'] is not None:
+                for item in b['ids']: release_item(item)
+                b['ids'] = None
+    if plane_id:
+        ids.append(plane_id); rows.append(camera.to_screen(plane_points()))
+    canvas.set_coords(ids, rows)
+    if created:
+        # New items land on top; keep the plane, then the cockpit frame and HUD, in front of them
+        canvas.tag_raise("plane")
+        if cockpit_ids: canvas.tag_raise("cockpit"); canvas.tag_raise("hud")
+
+    if camera.panned != [0.0, 0.0]:
+        for c in cloud_data:
+            c['x'] -= camera.panned[0]; c['y'] -= camera.panned[1]
+        camera.panned = [0.0, 0.0]
+        draw_clouds()
+
+# Before the mirror flush, so this frame's coords reach Tk this frame
+clock.render_hooks.insert(0, flight_render)
 
 def start_flight():
-    global state,plane_id,hud_text,flight_speed, is_cockpit_view
+    global state,plane_id,hud_text,flight_speed, is_cockpit_view, terrain, camera, plane_pos
     state="flight"; clear_game_tags(); canvas.config(bg="lightblue"); spawn_clouds()
     
-    # Ground (Textured Green)
-    canvas.create_rectangle(0, HEIGHT - 50, WIDTH, HEIGHT, fill="#38761d", outline="#1e4600", tags=("ground",))
+    # Ground (Textured Green) and buildings come from the terrain chunks, drawn by flight_render
+    terrain, camera = Terrain(rng.getrandbits(32)), Camera()
 
     is_cockpit_view = False
     
     # The plane is a simple shape for collision tracking, hidden in cockpit view
-    plane_id=canvas.create_polygon(WIDTH//3,HEIGHT//2,WIDTH//3-20,HEIGHT//2-10,WIDTH//3-20,HEIGHT//2+10,fill="gray", tags=("plane",))
+    plane_pos = [WIDTH//3, HEIGHT//2]
+    plane_id=canvas.create_polygon(*plane_points(),fill="gray", tags=("plane",))
     
     # HUD text repositioned to top-left to avoid top-right score/menu
     hud_text=canvas.create_text(10,20,text="Alt: 0 | Spd: 0 | View: External",font=("Arial",12),fill="black",tags=("hud",), anchor="w")
@@ -704,7 +2110,9 @@ def start_flight():
     root.bind("<c>", toggle_cockpit_view)
     root.bind("<Escape>",lambda e:(save_highscore("flight"),to_menu()))
     
-    init_score(); flight_spawn_loop(); flight_update_loop(); animate_clouds_loop()
+    init_score()
+    clock.every(50, flight_update_loop)
+    start_clouds_loop()
 
 def toggle_cockpit_view(event=None):
     global is_cockpit_view, plane_id, cockpit_ids, hud_text
@@ -745,83 +2153,51 @@ def toggle_cockpit_view(event=None):
         canvas.coords(hud_text, 10, 20)
         canvas.itemconfigure(hud_text, fill="black", anchor="w")
 
-def flight_spawn_loop():
-    if state!="flight": return
-    if random.random()<0.25:
-        # Textured Building Spawn
-        w,h=random.randint(30,50),random.randint(80,160)
-        x_start = WIDTH + 10
-        y_ground = HEIGHT - 50
-        
-        # Main Building Body (Greyish/Concrete)
-        b_body = canvas.create_rectangle(x_start, y_ground - h, x_start + w, y_ground,
-                                     fill="#5e5e5e", outline="#333", width=1)
-        # Roof (Maroon/Textured)
-        roof_h = h // 8
-        b_roof = canvas.create_rectangle(x_start - 2, y_ground - h - roof_h, x_start + w + 2, y_ground - h,
-                                     fill="#a64d79", outline="#772b52")
-        
-        # Store both items together
-        buildings.append([b_body, b_roof])
-    aid=root.after(700,flight_spawn_loop); after_ids.append(aid)
-
 def flight_update_loop():
     global flight_speed, plane_id
-    if state!="flight" or not plane_id: return
+    if state!="flight" or not plane_id: return False
     flight_speed=6+score//10
     
-    # 1. Constant forward movement of the world
-    for b_list in list(buildings):
-        # Buildings always move towards the plane at flight_speed
-        is_gone = False
-        for b_id in b_list:
-            canvas.move(b_id,-flight_speed,0)
-            try:
-                if canvas.coords(b_id)[2]<0:
-                    canvas.delete(b_id)
-                    is_gone = True
-            except tk.TclError: # Handle case where the item might have been deleted already
-                is_gone = True
-                
+    # 1. Constant forward movement: the camera flies on, the world stays where it is
+    with profiler.phase("movement"):
+        camera.scroll(flight_speed)
+        # A point per building, the first time the camera gets past it
+        for i in terrain.span(terrain.scored_x, camera.x):
+            for b in terrain.chunk(i)['buildings']:
+                if terrain.scored_x <= b['body'][2] < camera.x: add_score(1)
+        terrain.scored_x = max(terrain.scored_x, camera.x)
+        terrain.prefetch(int((camera.x + WIDTH) // CHUNK_W) + 1)
         
-        if is_gone:
-            buildings.remove(b_list)
-            add_score(1)
-            continue
-        
-        # Collision Check (only check the main body ID)
-        if plane_id and collide_by_id(plane_id, b_list[0]):
-            # --- CRASH LOGIC ---
-            bbox = canvas.bbox(plane_id)
-            if bbox: large_explosion((bbox[0]+bbox[2])/2, (bbox[1]+bbox[3])/2)
-            
-            save_highscore("flight")
-            canvas.create_text(WIDTH//2,HEIGHT//2,text="Crashed",font=("Arial",20),fill=ACCENT)
-            canvas.delete(plane_id); plane_id = None; return
-            
-    # 2. Plane auto-moves forward slowly (moves only the hidden plane object, not the world)
-    move_safe(plane_id,flight_speed//4,0)
+        # 2. Plane auto-moves forward a little faster than the camera, drifting right on screen
+        move_plane(flight_speed + flight_speed//4, 0)
+
+    with profiler.phase("collision"):
+        box = plane_box()
+        for b in (b for i in terrain.span(box[0], box[2]) for b in terrain.chunk(i)['buildings']):
+            if boxes_overlap(box, b['body']):
+                # --- CRASH LOGIC ---
+                x1, y1, x2, y2 = camera.to_screen(box)
+                large_explosion((x1+x2)/2, (y1+y2)/2)
+                
+                save_highscore("flight")
+                canvas.create_text(WIDTH//2,HEIGHT//2,text="Crashed",font=("Arial",20),fill=ACCENT)
+                canvas.delete(plane_id); plane_id = None; return False
     
-    if plane_id:
-        bbox = canvas.bbox(plane_id)
-        if not bbox:
-            aid=root.after(50,flight_update_loop); after_ids.append(aid); return
-
-        x1,y1,x2,y2 = bbox
-        cx,cy=(x1+x2)//2,(y1+y2)//2
-        alt=max(0, (HEIGHT - 50) - cy)
-        
-        view_text = 'Cockpit' if is_cockpit_view else 'External'
+    x1,y1,x2,y2 = plane_box()
+    cy=(y1+y2)//2
+    alt=max(0, (HEIGHT - 50) - cy)
+    
+    view_text = 'Cockpit' if is_cockpit_view else 'External'
+    with profiler.phase("hud"):
         canvas.itemconfigure("hud",text=f"Alt: {alt:.0f} | Spd: {flight_speed} | View: {view_text}")
-        
-        if y2 >= HEIGHT - 50:
-            # --- GROUND CRASH LOGIC ---
-            spawn_particles(cx, cy, color="darkgreen")
-            save_highscore("flight")
-            canvas.create_text(WIDTH//2,HEIGHT//2,text="Crashed on Ground",font=("Arial",20),fill=ACCENT)
-            canvas.delete(plane_id); plane_id = None; return
-            
-    aid=root.after(50,flight_update_loop); after_ids.append(aid)
+    
+    if y2 >= HEIGHT - 50:
+        # --- GROUND CRASH LOGIC ---
+        sx1, sy1, sx2, sy2 = camera.to_screen((x1, y1, x2, y2))
+        spawn_particles((sx1+sx2)//2, (sy1+sy2)//2, color="darkgreen")
+        save_highscore("flight")
+        canvas.create_text(WIDTH//2,HEIGHT//2,text="Crashed on Ground",font=("Arial",20),fill=ACCENT)
+        canvas.delete(plane_id); plane_id = None; return False
 
 # ---------- Game 3: Click Clicker (Fixed Polygon Coords) ----------
 
@@ -837,14 +2213,14 @@ def show_clicker_time_select():
     y_start = 150
     
     for t in times:
-        b = tk.Button(root, text=f"{t} Seconds",
+        b = make_button(text=f"{t} Seconds",
                       command=lambda time=t: start_clicker(time),
                       bg="white", fg="darkgreen", font=("Arial", 11, "bold"))
         ui_buttons.append(b)
         canvas.create_window(WIDTH//2, y_start, window=b)
         y_start += 50
     
-    b = tk.Button(root, text="Back to Menu", command=to_menu, bg="lightgray", fg="black", font=("Arial", 10))
+    b = make_button(text="Back to Menu", command=to_menu, bg="lightgray", fg="black", font=("Arial", 10))
     ui_buttons.append(b)
     canvas.create_window(WIDTH//2, y_start + 50, window=b)
 
@@ -887,8 +2263,8 @@ def start_clicker(time_limit=30):
     # Ensure the new score text is on top of the old score text/elements
     canvas.tag_raise(score_text_id) 
 
-    # Start the timer loop
-    clicker_timer_loop(time_limit)
+    # Start the timer loop (first tick one second from now)
+    clock.every(1000, clicker_timer_loop, delay_ms=1000)
     root.bind("<Escape>",lambda e:(save_highscore("clicker"),to_menu()))
 
 def clicker_clicked(event):
@@ -905,20 +2281,20 @@ def clicker_clicked(event):
             add_score(1)
             # Simple visual feedback: move button slightly down and back up
             canvas.move("clickbtn", 0, 2)
-            root.after(50, lambda: canvas.move("clickbtn", 0, -2))
+            clock.after(50, lambda: canvas.move("clickbtn", 0, -2)) # On the clock so replays match
             # Spawn tiny particles for effect
             spawn_particles(event.x, event.y, color="yellow")
 
-def clicker_timer_loop(time_remaining):
+def clicker_timer_loop():
     """Counts down the timer and ends the game."""
     global clicker_timer, score_text_id, is_game_over
-    if state != "clicker" or is_game_over: return
+    if state != "clicker" or is_game_over: return False
     
-    clicker_timer = time_remaining
+    clicker_timer -= 1
     if score_text_id:
         canvas.itemconfigure(score_text_id, text=f"Score: {click_count} | Time: {clicker_timer}s")
 
-    if time_remaining <= 0:
+    if clicker_timer <= 0:
         is_game_over = True
         save_highscore("clicker")
         
@@ -929,16 +2305,98 @@ def clicker_timer_loop(time_remaining):
         
         # Unbind the click event
         canvas.tag_unbind("clickbtn", "<Button-1>")
-        return
-        
-    aid = root.after(1000, lambda: clicker_timer_loop(time_remaining - 1))
-    after_ids.append(aid)
+        return False
 
 
 # ---------- Game 4: Breakout ----------
-def start_breakout():
-    global state, paddle_id, ball_pairs, brick_ids
+BRICK_W, BRICK_H, BRICK_TOP, BRICK_ROWS = 50, 20, 50, 4 # Brick layout: cell size, top edge, rows
+
+def brick_box(r, c):
+    """Canvas box of the brick in grid cell (r, c), 2px short of the next cell for spacing."""
+    x1, y1 = c * BRICK_W, BRICK_TOP + r * BRICK_H
+    return (x1, y1, x1 + BRICK_W - 2, y1 + BRICK_H - 2)
+
+POWERUP_CHANCE = 0.1 # Chance a broken brick drops a multi-ball capsule
+MAX_BALLS = 500 # Multi-ball stops cloning past this many balls
+STRESS_BALLS = 200 # Balls the stress mode starts with
+
+class BallBatch(BodyBatch):
+    """Breakout balls, moved together in one step per tick.
+
+    Balls whose path this tick stays clear of the brick rows and the paddle
+    just integrate, all at once. Only the rest are swept one by one against
+    the brick grid and the paddle (see sweep_ball). Walls bounce every ball
+    in one pass and the canvas gets one batched coords update.
+    """
+
+    def near(self, paddle):
+        """Per ball, whether its path this tick reaches the brick rows or (falling) the paddle."""
+        c = self.cols
+        top, bottom = BRICK_TOP, BRICK_TOP + len(brick_grid) * BRICK_H
+        if np is not None:
+            lo, hi = c["y"] + np.minimum(c["vy"], 0), c["y"] + c["h"] + np.maximum(c["vy"], 0)
+            mask = (hi >= top) & (lo <= bottom)
+            if paddle: mask |= (c["vy"] > 0) & (hi >= paddle[1]) & (lo <= paddle[3])
+            return np.flatnonzero(mask).tolist()
+        near = []
+        for i, (y, h, vy) in enumerate(zip(c["y"], c["h"], c["vy"])):
+            lo, hi = y + min(vy, 0), y + h + max(vy, 0)
+            if (hi >= top and lo <= bottom) or (paddle and vy > 0 and hi >= paddle[1] and lo <= paddle[3]):
+                near.append(i)
+        return near
+
+    def step(self, floor_bounces=False):
+        """Moves every ball one tick and returns the new boxes.
+
+        Balls that fall past the floor are dropped, unless floor_bounces.
+        """
+        self._merge()
+        if not self.ids: return []
+        c = self.cols
+        paddle = canvas.coords(paddle_id) if paddle_id else None
+        near = self.near(paddle)
+        start = [(c["x"][i], c["y"][i]) for i in near]
+        self.integrate()
+        for i, (x, y) in zip(near, start):
+            box, c["vx"][i], c["vy"][i] = sweep_ball([x, y, x + c["w"][i], y + c["h"][i]], c["vx"][i], c["vy"][i], paddle)
+            c["x"][i], c["y"][i] = box[0], box[1]
+
+        # Walls (only when heading into them, so a ball never sticks in one)
+        if np is not None:
+            c["vx"][((c["x"] <= 0) & (c["vx"] < 0)) | ((c["x"] + c["w"] >= WIDTH) & (c["vx"] > 0))] *= -1
+            c["vy"][(c["y"] <= 0) & (c["vy"] < 0)] *= -1
+            if floor_bounces: c["vy"][(c["y"] + c["h"] >= HEIGHT) & (c["vy"] > 0)] *= -1
+        else:
+            c["vx"] = [-vx if (x <= 0 and vx < 0) or (x + w >= WIDTH and vx > 0) else vx
+                       for x, w, vx in zip(c["x"], c["w"], c["vx"])]
+            c["vy"] = [-vy if (y <= 0 and vy < 0) or (floor_bounces and y + h >= HEIGHT and vy > 0) else vy
+                       for y, h, vy in zip(c["y"], c["h"], c["vy"])]
+        if not floor_bounces:
+            self._drop(self._keep([y < HEIGHT for y in c["y"]]))
+        rows = self.boxes()
+        canvas.set_coords(self.ids, rows)
+        return rows
+
+def add_ball(x, y, vx, vy, size=16):
+    balls.add(pools["oval"].acquire(x, y, x + size, y + size, fill="yellow", tags=("ball",)), x, y, size, size, vx, vy)
+
+def build_bricks():
+    global brick_grid, bricks_left
+    colors = ["red", "orange", "yellow", "green"]
+    brick_grid = []
+    for r in range(BRICK_ROWS):
+        color = colors[r % len(colors)]
+        row = []
+        for c in range(WIDTH // BRICK_W):
+            row.append(canvas.create_rectangle(*brick_box(r, c), fill=color, outline="gray50", tags=("brick",)))
+        brick_grid.append(row)
+    bricks_left = sum(len(row) for row in brick_grid)
+
+def start_breakout(ball_count=1, stress=False):
+    """Starts Breakout; stress mode serves ball_count balls at once and never ends."""
+    global state, paddle_id, breakout_stress
     state = "breakout"; clear_game_tags(); canvas.config(bg="gray20")
+    breakout_stress = stress
     
     # 1. Paddle
     paddle_w, paddle_h = 80, 10
@@ -946,138 +2404,230 @@ def start_breakout():
                                         WIDTH // 2 + paddle_w // 2, HEIGHT - 30 + paddle_h, 
                                         fill="white", tags=("paddle",))
     
-    # 2. Ball
+    # 2. Balls: the first goes up at 45 degrees, any others at random upward angles
     ball_size = 8
-    ball_id = canvas.create_oval(WIDTH // 2 - ball_size, HEIGHT // 2 - ball_size, 
-                                 WIDTH // 2 + ball_size, HEIGHT // 2 + ball_size, 
-                                 fill="yellow", tags=("ball",))
-    ball_pairs.append({'id': ball_id, 'dx': random.choice([-5, 5]), 'dy': -5})
-    
-    # 3. Bricks
-    brick_w, brick_h = 50, 20
-    rows, cols = 4, WIDTH // brick_w
-    colors = ["red", "orange", "yellow", "green"]
-    y_start = 50
-    brick_ids = []
+    add_ball(WIDTH // 2 - ball_size, HEIGHT // 2 - ball_size, rng.choice([-5, 5]), -5)
+    for _ in range(ball_count - 1):
+        angle = rng.uniform(math.pi * 0.15, math.pi * 0.85)
+        add_ball(WIDTH // 2 - ball_size, HEIGHT // 2 - ball_size, 7 * math.cos(angle), -7 * math.sin(angle))
     
-    for r in range(rows):
-        color = colors[r % len(colors)]
-        for c in range(cols):
-            x1 = c * brick_w
-            x2 = (c + 1) * brick_w - 2 # -2 for spacing
-            y1 = y_start + r * brick_h
-            y2 = y_start + (r + 1) * brick_h - 2
-            
-            if x2 < WIDTH:
-                b_id = canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="gray50", tags=("brick",))
-                brick_ids.append(b_id)
+    # 3. Bricks, held in a grid by row and column
+    build_bricks()
                 
     # 4. Controls
     root.bind("<Left>", lambda e: canvas.move(paddle_id, -20, 0))
     root.bind("<Right>", lambda e: canvas.move(paddle_id, 20, 0))
-    root.bind("<Escape>",lambda e:(save_highscore("breakout"),to_menu()))
+    root.bind("<Escape>",lambda e:(breakout_stress or save_highscore("breakout"),to_menu()))
     
     init_score()
-    breakout_update_loop()
-
+    clock.every(30, breakout_update_loop)
+
+def first_brick_hit(box, dx, dy):
+    """Earliest brick the box sweeps into this move: (t, axis, row, col), or None.
+
+    Only the grid cells under the swept area are looked at.
+    """
+    x1, y1 = min(box[0], box[0] + dx), min(box[1], box[1] + dy)
+    x2, y2 = max(box[2], box[2] + dx), max(box[3], box[3] + dy)
+    r0, r1 = max(0, int((y1 - BRICK_TOP) // BRICK_H)), min(len(brick_grid) - 1, int((y2 - BRICK_TOP) // BRICK_H))
+    best = None
+    for r in range(r0, r1 + 1):
+        row = brick_grid[r]
+        for c in range(max(0, int(x1 // BRICK_W)), min(len(row) - 1, int(x2 // BRICK_W)) + 1):
+            if row[c] is None: continue
+            hit = sweep_box(box, dx, dy, brick_box(r, c))
+            if hit and (best is None or hit[0] < best[0]): best = hit + (r, c)
+    return best
+
+def break_brick(r, c):
+    global bricks_left
+    x1, y1, x2, y2 = brick_box(r, c)
+    canvas.delete(brick_grid[r][c])
+    brick_grid[r][c] = None
+    bricks_left -= 1
+    add_score(10)
+    spawn_particles((x1+x2)/2, (y1+y2)/2, color="lightgray")
+    if rng.random() < POWERUP_CHANCE:
+        x, y = (x1 + x2) / 2 - 8, y2
+        powerups.add(pools["rectangle"].acquire(x, y, x + 16, y + 8, fill="cyan", outline="white", tags=("powerup",)), x, y, 16, 8, 0, 3)
+
+def sweep_ball(box, vx, vy, paddle):
+    """Moves a ball box through this tick's path, bouncing off whatever it meets first.
+
+    The path is swept against the bricks and the paddle box, so a fast ball
+    cannot skip through a brick between ticks, and each bounce flips the
+    velocity on the axis of the face that was hit. Returns (box, vx, vy).
+    """
+    remaining = 1.0
+    for _ in range(3): # At most a few bounces in one tick
+        dx, dy = vx * remaining, vy * remaining
+        hit, brick = first_brick_hit(box, dx, dy), None
+        if hit: brick = hit[2:]
+        if paddle and vy > 0:
+            paddle_hit = sweep_box(box, dx, dy, paddle)
+            if paddle_hit and (hit is None or paddle_hit[0] < hit[0]): hit, brick = paddle_hit, None
+        if hit is None:
+            box = [box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy]
+            break
+        t, axis = hit[:2]
+        box = [box[0] + dx * t, box[1] + dy * t, box[2] + dx * t, box[3] + dy * t]
+        remaining *= 1 - t
+        if brick:
+            break_brick(*brick)
+            if axis == "x": vx *= -1
+            else: vy *= -1
+        elif axis == "x":
+            vx *= -1 # Off the paddle's side
+        else:
+            vy = -abs(vy)
+            # Adjust dx based on where it hit the paddle for better control (max deviation +/- 6)
+            vx = ((box[0] + box[2]) / 2 - (paddle[0] + paddle[2]) / 2) / 10
+    return box, vx, vy
+
+def multiball():
+    """Splits every ball into three, the copies angled 0.5 rad either side, up to MAX_BALLS."""
+    balls._merge()
+    c = balls.cols
+    for i in range(len(balls.ids)):
+        x, y, size, vx, vy = c["x"][i], c["y"][i], c["w"][i], c["vx"][i], c["vy"][i]
+        for a in (0.5, -0.5):
+            if len(balls) >= MAX_BALLS: return
+            add_ball(x, y, vx * math.cos(a) - vy * math.sin(a), vx * math.sin(a) + vy * math.cos(a), size)
+
+def powerups_step():
+    """Drops the falling capsules; one caught on the paddle sets off multi-ball."""
+    if not len(powerups): return
+    rows = powerups.step()
+    paddle = canvas.coords(paddle_id)
+    caught = [item for item, box in zip(powerups.ids, rows) if boxes_overlap(box, paddle)]
+    powerups.discard(caught + [item for item, box in zip(powerups.ids, rows) if box[1] >= HEIGHT])
+    for _ in caught: multiball()
 
 def breakout_update_loop():
     global is_game_over
-    if state != "breakout" or is_game_over: return
+    if state != "breakout" or is_game_over: return False
     
-    # Check for Win condition
-    if not brick_ids and not is_game_over:
+    # Check for Win condition (stress mode just deals a fresh wall)
+    if not bricks_left and breakout_stress:
+        build_bricks()
+    elif not bricks_left and not is_game_over:
         is_game_over = True
         save_highscore("breakout")
         canvas.create_text(WIDTH//2,HEIGHT//2,text="LEVEL CLEARED!",font=("Arial",20,"bold"),fill="lime")
-        return
+        return False
 
-    for ball in list(ball_pairs):
-        bid, dx, dy = ball['id'], ball['dx'], ball['dy']
-        canvas.move(bid, dx, dy)
-        
-        # Get ball bounding box
-        bbox = canvas.bbox(bid)
-        if not bbox: ball_pairs.remove(ball); continue
-        x1, y1, x2, y2 = bbox
-        
-        # Wall Collision
-        if x1 <= 0 or x2 >= WIDTH:
-            ball['dx'] *= -1
-        if y1 <= 0:
-            ball['dy'] *= -1
-            
-        # Paddle Collision
-        if paddle_id and collide_by_id(paddle_id, bid) and dy > 0:
-            ball['dy'] *= -1
-            # Adjust dx based on where it hit the paddle for better control
-            paddle_bbox = canvas.bbox(paddle_id)
-            ball_center_x = (x1 + x2) / 2
-            paddle_center_x = (paddle_bbox[0] + paddle_bbox[2]) / 2
-            offset = ball_center_x - paddle_center_x
-            # Max deviation of +/- 6
-            ball['dx'] = offset / 10 
-            
-            
-        # Brick Collision
-        hit_brick = canvas.find_overlapping(x1, y1, x2, y2)
-        for item in hit_brick:
-            if item in brick_ids:
-                brick_ids.remove(item)
-                canvas.delete(item)
-                
-                # Simple flip for now:
-                ball['dy'] *= -1
-                
-                add_score(10)
-                spawn_particles((x1+x2)/2, (y1+y2)/2, color="lightgray")
-                break
-                
-        # Floor Collision (Game Over for this ball)
-        if y1 >= HEIGHT:
-            canvas.delete(bid); ball_pairs.remove(ball)
-            if not ball_pairs and not is_game_over:
-                # Game over
-                is_game_over = True
-                save_highscore("breakout")
-                canvas.create_text(WIDTH//2,HEIGHT//2,text="GAME OVER",font=("Arial",20),fill=ACCENT)
-                return
-
-    aid = root.after(30, breakout_update_loop)
-    after_ids.append(aid)
+    balls.step(floor_bounces=breakout_stress)
+    powerups_step()
+    
+    # Floor Collision took the last ball: Game Over
+    if not len(balls) and not is_game_over:
+        is_game_over = True
+        save_highscore("breakout")
+        canvas.create_text(WIDTH//2,HEIGHT//2,text="GAME OVER",font=("Arial",20),fill=ACCENT)
+        return False
 
 # ---------- Game 5: Snake ----------
+class SnakeBoard:
+    """Snake rules on a cols x rows grid, with every operation O(1).
+
+    Cells are numbered y * cols + x. The body is a deque of cells, head
+    first. `occupied` is a bitset with one bit per cell. `free` lists every
+    cell not under the snake, and free_slot[cell] is where that cell sits in
+    it, so taking a cell is a swap with the last slot and a pop. Food is
+    drawn from `free` with a single random index, however full the board is.
+    """
+
+    def __init__(self, cols, rows):
+        self.cols, self.rows = cols, rows
+        self.occupied = bytearray((cols * rows + 7) // 8)
+        self.free = array("i", range(cols * rows)) # Compact: 4 bytes a cell even on huge boards
+        self.free_slot = array("i", range(cols * rows))
+        self.body = deque()
+        self.food = None
+
+    def is_occupied(self, cell):
+        return self.occupied[cell >> 3] >> (cell & 7) & 1
+
+    def _take(self, cell):
+        self.occupied[cell >> 3] |= 1 << (cell & 7)
+        slot, last = self.free_slot[cell], self.free[-1]
+        self.free[slot], self.free_slot[last] = last, slot
+        self.free.pop()
+
+    def _release(self, cell):
+        self.occupied[cell >> 3] &= ~(1 << (cell & 7))
+        self.free_slot[cell] = len(self.free)
+        self.free.append(cell)
+
+    def place(self, cells):
+        """Lays the body out on the given cells, head first."""
+        for cell in cells:
+            self.body.append(cell)
+            self._take(cell)
+
+    def spawn_food(self, rand):
+        """Puts food on a random free cell; None once the board is full."""
+        self.food = self.free[rand.randrange(len(self.free))] if self.free else None
+        return self.food
+
+    def step(self, dx, dy):
+        """Moves the head one cell: returns ("wall" | "self" | "ate" | "moved", vacated tail or None).
+
+        Running into any body cell ends the game, the tail's included, as
+        the tail only moves away after the head has arrived.
+        """
+        head = self.body[0]
+        x, y = head % self.cols + dx, head // self.cols + dy
+        if not (0 <= x < self.cols and 0 <= y < self.rows): return "wall", None
+        cell = y * self.cols + x
+        if self.is_occupied(cell): return "self", None
+        self.body.appendleft(cell)
+        self._take(cell)
+        if cell == self.food: return "ate", None
+        tail = self.body.pop()
+        self._release(tail)
+        return "moved", tail
+
+def snake_xy(cell):
+    """Top-left canvas pixel of a board cell."""
+    return cell % snake.cols * SNAKE_GRID_SIZE, cell // snake.cols * SNAKE_GRID_SIZE
+
+def snake_grid_image():
+    """The grid lines as one PhotoImage, drawn on first use (None when headless)."""
+    global snake_grid_photo
+    if snake_grid_photo is None and not HEADLESS:
+        snake_grid_photo = tk.PhotoImage(width=WIDTH, height=HEIGHT)
+        for i in range(WIDTH // SNAKE_GRID_SIZE):
+            snake_grid_photo.put("gray30", to=(i * SNAKE_GRID_SIZE, 0, i * SNAKE_GRID_SIZE + 1, HEIGHT))
+        for j in range(HEIGHT // SNAKE_GRID_SIZE):
+            snake_grid_photo.put("gray30", to=(0, j * SNAKE_GRID_SIZE, WIDTH, j * SNAKE_GRID_SIZE + 1))
+    return snake_grid_photo
+
+def snake_rect(cell):
+    x, y = snake_xy(cell)
+    return [x, y, x + SNAKE_GRID_SIZE, y + SNAKE_GRID_SIZE]
+
 def start_snake():
-    global state, snake_cells, food_pos, snake_dir, is_game_over
+    global state, snake, snake_dir, is_game_over
     state = "snake"; clear_game_tags(); canvas.config(bg="gray10")
     is_game_over = False
     
     # Initial setup
-    snake_cells = []
+    cols, rows = WIDTH // SNAKE_GRID_SIZE, HEIGHT // SNAKE_GRID_SIZE
+    snake = SnakeBoard(cols, rows)
     snake_dir = (1, 0) # Start moving right
     
-    # Draw Grid (optional, for visibility)
-    for i in range(WIDTH // SNAKE_GRID_SIZE):
-        canvas.create_line(i * SNAKE_GRID_SIZE, 0, i * SNAKE_GRID_SIZE, HEIGHT, fill="gray30")
-    for j in range(HEIGHT // SNAKE_GRID_SIZE):
-        canvas.create_line(0, j * SNAKE_GRID_SIZE, WIDTH, j * SNAKE_GRID_SIZE, fill="gray30")
+    # Draw Grid (one cached image instead of a line per row and column)
+    canvas.create_image(0, 0, image=snake_grid_image(), anchor="nw", tags=("snake_grid",))
         
-    # Initial Snake (start at center)
-    start_x = (WIDTH // SNAKE_GRID_SIZE // 2) * SNAKE_GRID_SIZE
-    start_y = (HEIGHT // SNAKE_GRID_SIZE // 2) * SNAKE_GRID_SIZE
-    
-    # Snake body is a list of [x, y] coordinates
-    snake_cells.append([start_x, start_y])
-    snake_cells.append([start_x - SNAKE_GRID_SIZE, start_y])
-    snake_cells.append([start_x - 2 * SNAKE_GRID_SIZE, start_y])
-    
-    # Draw initial snake (loop only draws the body color)
-    for x, y in snake_cells:
-        canvas.create_rectangle(x, y, x + SNAKE_GRID_SIZE, y + SNAKE_GRID_SIZE, 
-                                fill="green", tags=("snake_body",))
-        
-    # Draw head color separately
-    draw_snake_head(snake_cells[0][0], snake_cells[0][1], is_new=True)
+    # Initial Snake (start at center, three cells long)
+    start = rows // 2 * cols + cols // 2
+    snake.place([start, start - 1, start - 2])
+    
+    # One rectangle per body cell, head first, the head in its own color
+    for cell in snake.body:
+        snake_items.append(canvas.create_rectangle(*snake_rect(cell), fill="green", tags=("snake_body",)))
+    canvas.itemconfigure(snake_items[0], fill="lime")
     
     # Spawn food
     spawn_food()
@@ -1090,36 +2640,7 @@ def start_snake():
     root.bind("<Escape>",lambda e:(save_highscore("snake"),to_menu()))
     
     init_score()
-    snake_update_loop()
-
-def draw_snake_head(x, y, is_new=False):
-    """Redraws the head cell with a different color."""
-    
-    # 1. Change the previous head cell's color to body green (if it exists)
-    for item in canvas.find_withtag("snake_head"):
-        # The head is now a body segment
-        canvas.itemconfigure(item, fill="green")
-        canvas.dtag(item, "snake_head")
-            
-    # 2. Draw/Update the new head
-    head_coords = [x, y, x + SNAKE_GRID_SIZE, y + SNAKE_GRID_SIZE]
-    
-    # Find the item at the new head's coordinates (should be the last segment drawn if new, or the tail being moved)
-    overlapping = canvas.find_overlapping(*head_coords)
-    found = False
-    for item in overlapping:
-        tags = canvas.gettags(item)
-        if "snake_body" in tags and "food" not in tags:
-            # Change existing body segment to head color
-            canvas.itemconfigure(item, fill="lime", tags=("snake_body", "snake_head"))
-            found = True
-            break
-            
-    if not found:
-        # If no overlapping body segment found (e.g., first segment draw)
-        canvas.create_rectangle(x, y, x + SNAKE_GRID_SIZE, y + SNAKE_GRID_SIZE,
-                                fill="lime", tags=("snake_body", "snake_head"))
-
+    clock.every(150, snake_update_loop) # Speed
 
 def set_snake_dir(dx, dy):
     global snake_dir
@@ -1129,27 +2650,18 @@ def set_snake_dir(dx, dy):
         snake_dir = (dx, dy)
 
 def spawn_food():
-    global food_pos
-    canvas.delete("food")
-    
-    while True:
-        # Calculate max grid positions
-        max_x = WIDTH // SNAKE_GRID_SIZE - 1
-        max_y = HEIGHT // SNAKE_GRID_SIZE - 1
-        
-        # Generate random grid coordinates
-        fx = random.randint(0, max_x) * SNAKE_GRID_SIZE
-        fy = random.randint(0, max_y) * SNAKE_GRID_SIZE
-        
-        # Check if food is inside snake body
-        is_on_snake = any(cell[0] == fx and cell[1] == fy for cell in snake_cells)
-        
-        if not is_on_snake:
-            food_pos = [fx, fy]
-            # Draw a shiny red circle/oval for the food
-            canvas.create_oval(fx + 2, fy + 2, fx + SNAKE_GRID_SIZE - 2, fy + SNAKE_GRID_SIZE - 2, 
-                               fill="red", outline="orange", width=2, tags=("food",))
-            break
+    global food_id
+    cell = snake.spawn_food(rng)
+    if cell is None: # Board full: nowhere left to put food
+        canvas.delete("food"); food_id = None
+        return
+    fx, fy = snake_xy(cell)
+    coords = (fx + 2, fy + 2, fx + SNAKE_GRID_SIZE - 2, fy + SNAKE_GRID_SIZE - 2)
+    if food_id is None:
+        # Draw a shiny red circle/oval for the food; later food just moves it
+        food_id = canvas.create_oval(*coords, fill="red", outline="orange", width=2, tags=("food",))
+    else:
+        canvas.coords(food_id, *coords)
 
 def snake_game_over():
     global is_game_over
@@ -1157,63 +2669,124 @@ def snake_game_over():
     save_highscore("snake")
     
     canvas.create_text(WIDTH//2,HEIGHT//2,
-                       text=f"GAME OVER! Length: {len(snake_cells)}",
+                       text=f"GAME OVER! Length: {len(snake.body)}",
                        font=("Arial",20,"bold"),fill=ACCENT)
 
 def snake_update_loop():
-    global snake_cells, food_pos, snake_dir
-    if state != "snake" or is_game_over: return
+    if state != "snake" or is_game_over: return False
     
-    # Calculate new head position
-    head_x, head_y = snake_cells[0]
-    new_head_x = head_x + snake_dir[0] * SNAKE_GRID_SIZE
-    new_head_y = head_y + snake_dir[1] * SNAKE_GRID_SIZE
+    outcome, tail = snake.step(*snake_dir)
     
-    # 1. Collision Checks
-    
-    # Wall collision
-    if (new_head_x < 0 or new_head_x >= WIDTH or 
-        new_head_y < 0 or new_head_y >= HEIGHT):
-        snake_game_over(); return
-        
-    # Self collision (check against the body segments, excluding the current head)
-    if [new_head_x, new_head_y] in snake_cells[1:]:
-        snake_game_over(); return
+    # 1. Collision Checks (walls and body)
+    if outcome in ("wall", "self"):
+        snake_game_over(); return False
         
-    # 2. Movement and Food
-    
-    # Add new head to the front
-    snake_cells.insert(0, [new_head_x, new_head_y])
-    
-    # Food check
-    if new_head_x == food_pos[0] and new_head_y == food_pos[1]:
-        # Don't pop the tail (grow)
+    # 2. Redraw: the old head turns to body, and the new head is either
+    # a fresh rectangle (grown) or the old tail's, moved to the front
+    canvas.itemconfigure(snake_items[0], fill="green")
+    if outcome == "ate":
+        snake_items.appendleft(canvas.create_rectangle(*snake_rect(snake.body[0]), fill="lime", tags=("snake_body",)))
         spawn_food()
         add_score(10)
     else:
-        # Pop the tail (move normally)
-        tail_x, tail_y = snake_cells.pop()
-        
-        # Delete the canvas object corresponding to the old tail
-        tail_coords = [tail_x, tail_y, tail_x + SNAKE_GRID_SIZE, tail_y + SNAKE_GRID_SIZE]
-        items_at_tail = canvas.find_overlapping(*tail_coords)
-        for item in items_at_tail:
-            tags = canvas.gettags(item)
-            # Find the body segment that matches the tail coordinates and delete it
-            if "snake_body" in tags and "food" not in tags and list(canvas.coords(item)) == tail_coords:
-                canvas.delete(item)
-                break
-        
-    # 3. Redraw (update head and body color)
-    draw_snake_head(head_x, head_y) # Change old head to body
-    draw_snake_head(new_head_x, new_head_y, is_new=True) # Draw new head
-    
-    aid = root.after(150, snake_update_loop) # Speed
-    after_ids.append(aid)
+        item = snake_items.pop()
+        canvas.coords(item, *snake_rect(snake.body[0]))
+        canvas.itemconfigure(item, fill="lime")
+        snake_items.appendleft(item)
 
 # ---------- Game 6: Drawing Studio ----------
+STROKE_SEGMENT_POINTS = 200 # Points per polyline; a longer stroke carries on in a new one
+
+def stroke_spans(points, width, clip_w, clip_h):
+    """Pixel rows covered by a round-capped polyline: {y: [(x1, x2), ...]}, x2 exclusive.
+
+    Each segment with its round ends is a capsule (every point within half
+    the width of it), and being convex it meets each pixel row's centre
+    line in one interval, worked out directly: the hull of the two end
+    discs and the band between them. Intervals on a row are then merged.
+    """
+    r = max(width / 2, 0.5)
+    rr = r * r
+    rows = {}
+    for k in range(0, len(points) - 2, 2):
+        x0, y0, x1, y1 = points[k:k + 4]
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy)
+        if dy:
+            # The band's row interval: within r across the line, and between the ends along it
+            slope, half = dx / dy, r * length / abs(dy)
+            ends = dy / dx if dx else None
+        for y in range(max(0, int(min(y0, y1) - r)), min(clip_h, int(max(y0, y1) + r) + 1)):
+            cy = y + 0.5
+            lo, hi = math.inf, -math.inf
+            d = cy - y0
+            if -r <= d <= r:
+                h = math.sqrt(rr - d * d); lo, hi = x0 - h, x0 + h
+            d1 = cy - y1
+            if -r <= d1 <= r:
+                h = math.sqrt(rr - d1 * d1); lo, hi = min(lo, x1 - h), max(hi, x1 + h)
+            if not dy:
+                if dx and -r <= d <= r: lo, hi = min(lo, x0, x1), max(hi, x0, x1)
+            else:
+                xc = x0 + d * slope
+                b0, b1 = xc - half, xc + half
+                if ends is None:
+                    inside = min(y0, y1) <= cy <= max(y0, y1)
+                else:
+                    # Where the perpendiculars through the two ends cross this row
+                    e0, e1 = x0 - d * ends, x1 - d1 * ends
+                    b0, b1 = max(b0, min(e0, e1)), min(b1, max(e0, e1))
+                    inside = True
+                if inside and b0 <= b1: lo, hi = min(lo, b0), max(hi, b1)
+            if lo <= hi: rows.setdefault(y, []).append((math.ceil(lo - 0.5), math.floor(hi + 0.5)))
+    for y, spans in rows.items():
+        spans.sort()
+        merged = [list(spans[0])]
+        for a, b in spans[1:]:
+            if a <= merged[-1][1]: merged[-1][1] = max(merged[-1][1], b)
+            else: merged.append([a, b])
+        rows[y] = [(max(a, 0), min(b, clip_w)) for a, b in merged if b > 0 and a < clip_w and b > a]
+    return rows
+
+class RasterLayer:
+    """Finished strokes, flattened into one off-screen image shown by a single canvas item.
+
+    flatten() paints a stroke's pixels into the image, so the stroke's
+    line items can go and the item count stays flat however much is
+    drawn. Rows with the same span are painted as one rectangle. Without
+    a display there is no image, but the spans are still worked out and
+    counted.
+    """
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.photo = tk.PhotoImage(width=width, height=height) if not HEADLESS else None
+        self.item = canvas.create_image(0, 0, image=self.photo, anchor="nw", tags=("ink_raster",))
+        self.strokes = self.fills = 0
+
+    def flatten(self, points, color, width):
+        rows = stroke_spans(points, width, self.width, self.height)
+        open_rects, rects = {}, [] # (x1, x2) -> [top, bottom] still growing downwards
+        for y in sorted(rows):
+            spans = set(rows[y])
+            for span in list(open_rects):
+                if span not in spans or open_rects[span][1] != y:
+                    rects.append((span[0], open_rects[span][0], span[1], open_rects.pop(span)[1]))
+            for span in spans:
+                if span in open_rects: open_rects[span][1] = y + 1
+                else: open_rects[span] = [y, y + 1]
+        rects += [(span[0], top, span[1], bottom) for span, (top, bottom) in open_rects.items()]
+        if self.photo is not None:
+            for rect in rects: self.photo.put(color, to=rect)
+        self.strokes += 1
+        self.fills += len(rects)
+
+    def clear(self):
+        if self.photo is not None: self.photo.blank()
+        self.strokes = self.fills = 0
+
 def start_drawing():
-    global state, draw_color, draw_size, last_x, last_y
+    global state, draw_color, draw_size, last_x, last_y, ink_raster
     state = "drawing"; clear_game_tags(); canvas.config(bg="white")
     
     draw_color = "black"
@@ -1223,12 +2796,13 @@ def start_drawing():
     control_panel_h = 40
     canvas.create_rectangle(0, HEIGHT - control_panel_h, WIDTH, HEIGHT, 
                             fill="gray80", outline="", tags=("drawing_ui",))
+    ink_raster = RasterLayer(WIDTH, HEIGHT - control_panel_h)
     
     # Color buttons
     colors = ["black", "red", "blue", "green", "yellow", "white"]
     x_offset = 10
     for color in colors:
-        b = tk.Button(root, text="", width=2, bg=color, 
+        b = make_button(text="", width=2, bg=color, 
                       command=lambda c=color: set_draw_color(c), relief=tk.RAISED)
         ui_buttons.append(b)
         canvas.create_window(x_offset, HEIGHT - 20, window=b)
@@ -1237,14 +2811,14 @@ def start_drawing():
     # Size buttons
     sizes = [3, 6, 10, 20]
     for size in sizes:
-        b = tk.Button(root, text=f"{size}", bg="white", fg="black", 
+        b = make_button(text=f"{size}", bg="white", fg="black", 
                       command=lambda s=size: set_draw_size(s), font=("Arial", 8))
         ui_buttons.append(b)
         canvas.create_window(x_offset + 10, HEIGHT - 20, window=b)
         x_offset += 40
         
     # Clear Button
-    b_clear = tk.Button(root, text="Clear", bg="red", fg="white", 
+    b_clear = make_button(text="Clear", bg="red", fg="white", 
                         command=clear_drawing_canvas, font=("Arial", 10))
     ui_buttons.append(b_clear)
     canvas.create_window(WIDTH - 50, HEIGHT - 20, window=b_clear)
@@ -1256,16 +2830,11 @@ def start_drawing():
     root.bind("<Escape>",to_menu) # No highscore for drawing
 
 def clear_drawing_canvas():
-    """Deletes all items except the control panel."""
-    # Find all items except those tagged as drawing_ui
-    all_items = set(canvas.find_all())
-    ui_items = set(canvas.find_withtag("drawing_ui"))
-    
-    # Get all items that are NOT part of the UI
-    items_to_delete = list(all_items - ui_items)
-
-    for item in items_to_delete:
-        canvas.delete(item)
+    """Wipes the drawing: the raster layer and any stroke still being drawn."""
+    global stroke
+    canvas.delete("ink")
+    stroke = None
+    ink_raster.clear()
 
 def set_draw_color(color):
     global draw_color
@@ -1276,36 +2845,434 @@ def set_draw_size(size):
     draw_size = size
 
 def draw_motion_start(event):
-    global last_x, last_y
+    global last_x, last_y, stroke
     if state != "drawing" or event.y > HEIGHT - 40: return # Ignore clicks on the control panel
     last_x, last_y = event.x, event.y
+    # One stroke: every point so far, and its polylines (the last one still growing from `start`)
+    stroke = {'points': [event.x, event.y], 'ids': [], 'start': 0, 'color': draw_color, 'width': draw_size}
 
 def draw_motion(event):
     global last_x, last_y
-    if state != "drawing" or event.y > HEIGHT - 40: return # Ignore drawing on the control panel
+    if state != "drawing" or stroke is None or event.y > HEIGHT - 40: return # Ignore drawing on the control panel
     
-    # Draw a line from the last known position to the current position
-    canvas.create_line(last_x, last_y, event.x, event.y, 
-                       fill=draw_color, width=draw_size, 
-                       capstyle=tk.ROUND, smooth=tk.TRUE)
+    # Extend the stroke's polyline from the last known position to the current one
+    points = stroke['points']
+    points += [event.x, event.y]
+    if not stroke['ids'] or len(points) - stroke['start'] > 2 * STROKE_SEGMENT_POINTS:
+        stroke['start'] = len(points) - 4 # Carry on from the last point in a fresh polyline
+        stroke['ids'].append(canvas.create_line(last_x, last_y, event.x, event.y,
+                                                fill=stroke['color'], width=stroke['width'],
+                                                capstyle=tk.ROUND, joinstyle=tk.ROUND, tags=("ink",)))
+    else:
+        canvas.coords(stroke['ids'][-1], *points[stroke['start']:])
                        
     # Update last position
     last_x, last_y = event.x, event.y
 
 def draw_motion_end(event):
-    pass # No specific action needed on release
+    """Flattens the finished stroke into the raster layer and drops its polylines."""
+    global stroke
+    if stroke is None: return
+    if stroke['ids']:
+        ink_raster.flatten(stroke['points'], stroke['color'], stroke['width'])
+        canvas.delete(*stroke['ids'])
+    stroke = None
 
 # ---------- Game 7: Animation Studio (The requested feature) ----------
+KEYFRAME_MS = 100 # Default time from one keyframe to the next: the studio's playback step before fps
+KEYFRAME_MS_CHOICES = (100, 200, 500, 1000, 2000) # Keyframe spacings Ctrl+K steps through
+ANIM_FPS_CHOICES = (10, 20, 50) # Playback rates; every spacing above is a whole number of frames at each
+EASINGS = {
+    "linear": lambda u: u,
+    "ease": lambda u: u * u * (3 - 2 * u), # Eases in and out of each keyframe
+}
+FRAME_PAIR_CACHE = 64 # Keyframe pairs whose delta and tween stay worked out
+ANIM_PROJECT_FILE = "animation.ctanim" # Where the studio saves (Ctrl+S) and opens (Ctrl+O) its project
+ANIM_PROJECT_MAGIC = b"CTANIM1\0"
+ANIM_HEADER = struct.Struct("<8sIQQ") # Magic, frame count, frame index offset, shape table offset
+ANIM_FULL_EVERY = 32 # Every this many frames is stored whole, so any frame decodes from at most this many records
+ANIM_FRAME_CACHE = 64 # Decoded frames an open project keeps
+ANIM_PANEL_H = 60 # Height of the control panel along the bottom; the stage is the rest
+ANIM_BG = "lightgray"
+ANIM_EXPORT_FILE = "animation.gif" # Where Ctrl+E exports to
+EXPORT_CHUNK = 4 # Frames a worker renders and encodes per job
+SHEET_MAX_W = 2048 # Sprite sheets wrap to a new shelf past this width
+GRID_FILL = (40, 25) # Columns and rows of shapes Ctrl+G fills the stage with: a thousand
+DUPLICATE_OFFSET = 10 # How far down and right Ctrl+D puts each copy
+NAMED_COLORS = { # Tk colours for exports made without a window to ask
+    "black": (0, 0, 0), "white": (255, 255, 255), "lightgray": (211, 211, 211), "gray": (190, 190, 190),
+    "red": (255, 0, 0), "green": (0, 255, 0), "blue": (0, 0, 255), "yellow": (255, 255, 0),
+    "orange": (255, 165, 0), "purple": (160, 32, 240), "pink": (255, 192, 203), "brown": (165, 42, 42),
+    "cyan": (0, 255, 255), "magenta": (255, 0, 255),
+}
+
+# --- Project files ---
+# Shapes (id, type) and fill colours are stored once, in a JSON table at the
+# end. Each frame is a record of its changes from the frame before: removed
+# shape slots, moved slots with float32 coordinate deltas, and new fills.
+# Every ANIM_FULL_EVERY-th frame is taken against an empty frame instead, and
+# an offset index lets any frame be found without reading the others.
+# Shapes are ovals and rectangles, so a moved shape is always four deltas.
+# The table also holds the time between keyframes.
+
+def save_project(path, frames, keyframe_ms=KEYFRAME_MS):
+    """Writes a sequence of frames, keyframe_ms apart in playback, to path as an animation project."""
+    slots, fills, shapes, palette, index = {}, {}, [], [], []
+    current, last = {}, {} # Slot -> (coords as they will decode, fill), and the frame before
+    with open(path, "wb") as f:
+        f.write(bytes(ANIM_HEADER.size))
+        for n, frame in enumerate(frames):
+            full = n % ANIM_FULL_EVERY == 0
+            base = {} if full else current
+            current, moved, deltas, refills = {}, [], [], []
+            for shape_id, data in frame.items():
+                slot = slots.get((shape_id, data['type']))
+                if slot is None:
+                    slot = slots[(shape_id, data['type'])] = len(shapes)
+                    shapes.append((shape_id, data['type']))
+                fill = fills.get(data['fill'])
+                if fill is None:
+                    fill = fills[data['fill']] = len(palette)
+                    palette.append(data['fill'])
+                was = base.get(slot)
+                if was is not None and last.get(shape_id) is data: # Shared with the frame before: unchanged
+                    current[slot] = was
+                    continue
+                old = was[0] if was else (0.0,) * 4
+                step = struct.unpack("<4f", struct.pack("<4f", *(c - b for c, b in zip(data['coords'], old))))
+                coords = old
+                if was is None or any(step):
+                    moved.append(slot); deltas += step
+                    coords = [b + d for b, d in zip(old, step)] # What the reader will get, so errors never add up
+                if was is None or was[1] != fill: refills += (slot, fill)
+                current[slot] = (coords, fill)
+            removed = [slot for slot in base if slot not in current]
+            index.append(f.tell())
+            f.write(struct.pack(f"<3I{len(removed) + len(moved)}I{len(deltas)}f{len(refills)}I",
+                                len(removed), len(moved), len(refills) // 2, *removed, *moved, *deltas, *refills))
+            last = frame
+        index_at = f.tell()
+        f.write(struct.pack(f"<{len(index)}Q", *index))
+        table_at = f.tell()
+        f.write(json.dumps({'shapes': shapes, 'fills': palette, 'keyframe_ms': keyframe_ms}, separators=(",", ":")).encode())
+        f.seek(0)
+        f.write(ANIM_HEADER.pack(ANIM_PROJECT_MAGIC, len(index), index_at, table_at))
+
+class AnimProject:
+    """An animation project on disk, memory-mapped; frames decode when first asked for.
+
+    Stands in for the studio's list of keyframes. Frames recorded into it
+    stay in memory, in order among the file's, until the project is saved.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.index_at, table_at = ANIM_HEADER.unpack_from(self.map)
+        if magic != ANIM_PROJECT_MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not an animation project")
+        table = json.loads(self.map[table_at:])
+        self.shapes, self.fills = [tuple(s) for s in table['shapes']], table['fills']
+        self.keyframe_ms = table.get('keyframe_ms', KEYFRAME_MS) # Projects saved before it was stored used the default
+        self.order = None # Position -> file frame number or recorded frame; None while it is the file's order
+        self.decoded = OrderedDict() # File frame number -> frame, least recently used first
+
+    def __len__(self):
+        return self.count if self.order is None else len(self.order)
+
+    def __getitem__(self, i):
+        entry = range(self.count)[i] if self.order is None else self.order[i]
+        return entry if isinstance(entry, dict) else self.frame(entry)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def insert(self, i, frame):
+        if self.order is None: self.order = list(range(self.count))
+        self.order.insert(i, frame)
+
+    def close(self):
+        self.map.close()
+
+    def frame(self, n):
+        """File frame n, decoded from the frame before it unless it is stored whole."""
+        frame = self.decoded.get(n)
+        if frame is not None:
+            self.decoded.move_to_end(n)
+            return frame
+        frame = self.decode(n, {} if n % ANIM_FULL_EVERY == 0 else self.frame(n - 1))
+        self.decoded[n] = frame
+        if len(self.decoded) > ANIM_FRAME_CACHE: self.decoded.popitem(last=False)
+        return frame
+
+    def decode(self, n, base):
+        """Applies record n to base. Shapes it leaves alone keep base's data, so frames share it."""
+        at, = struct.unpack_from("<Q", self.map, self.index_at + 8 * n)
+        removed, moved, refilled = struct.unpack_from("<3I", self.map, at)
+        slots = struct.unpack_from(f"<{removed + moved}I", self.map, at + 12)
+        at += 12 + 4 * (removed + moved)
+        deltas = struct.unpack_from(f"<{4 * moved}f", self.map, at)
+        refills = struct.unpack_from(f"<{2 * refilled}I", self.map, at + 16 * moved)
+        fills = dict(zip(refills[::2], refills[1::2]))
+        frame = dict(base)
+        for slot in slots[:removed]: frame.pop(self.shapes[slot][0], None)
+        for k, slot in enumerate(slots[removed:]):
+            shape_id, kind = self.shapes[slot]
+            old = frame.get(shape_id)
+            step = deltas[4 * k:4 * k + 4]
+            frame[shape_id] = {'type': kind,
+                               'coords': [b + d for b, d in zip(old['coords'], step)] if old else list(step),
+                               'fill': self.fills[fills.pop(slot)] if slot in fills else old['fill']}
+        for slot, fill in fills.items(): # Recoloured without moving
+            shape_id, kind = self.shapes[slot]
+            frame[shape_id] = dict(frame[shape_id], fill=self.fills[fill])
+        return frame
+
+# --- Export ---
+# Frames are painted off-screen into rows of palette indices, the way the
+# canvas draws them, by worker processes that also encode them. The parent
+# only writes the results out, in order, as they come back.
+
+def color_rgb(name):
+    """(r, g, b) for a Tk colour, asked of Tk itself when there is a window."""
+    if name.startswith("#") and len(name) in (4, 7):
+        digits = name[1:] if len(name) == 7 else "".join(c * 2 for c in name[1:])
+        return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+    if not HEADLESS:
+        try: return tuple(v >> 8 for v in root.winfo_rgb(name))
+        except tk.TclError: pass
+    return NAMED_COLORS.get(name.lower(), (128, 128, 128))
+
+def paint_shape(pixels, width, height, kind, x1, y1, x2, y2, color):
+    """Fills the pixels whose centres fall inside an oval or rectangle."""
+    cx, cy, rx, ry = (x1 + x2) / 2, (y1 + y2) / 2, (x2 - x1) / 2, (y2 - y1) / 2
+    if rx <= 0 or ry <= 0: return
+    run = bytes((color,)) * width
+    for y in range(max(0, math.ceil(y1 - 0.5)), min(height, math.ceil(y2 - 0.5))):
+        a, b = x1, x2
+        if kind == 'oval':
+            t = (y + 0.5 - cy) / ry
+            half = rx * math.sqrt(max(0.0, 1 - t * t))
+            a, b = cx - half, cx + half
+        left, right = max(0, math.ceil(a - 0.5)), min(width, math.ceil(b - 0.5))
+        if left < right: pixels[y * width + left:y * width + right] = run[:right - left]
+
+def rasterize_frame(frame, width, height, colors):
+    """A frame as row-major palette indices, shapes painted in stacking order over index 0."""
+    pixels = bytearray(width * height)
+    for data in frame.values():
+        x1, y1, x2, y2 = data['coords']
+        paint_shape(pixels, width, height, data['type'], x1, y1, x2, y2, 1) # The canvas's default black outline
+        paint_shape(pixels, width, height, data['type'], x1 + 1, y1 + 1, x2 - 1, y2 - 1, colors.get(data['fill'], 1))
+    return pixels
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def encode_png(pixels, width, height, rgb):
+    """A palette PNG of row-major palette indices."""
+    raw = b"".join(b"\0" + pixels[y * width:(y + 1) * width] for y in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+            + png_chunk(b"PLTE", bytes(c for color in rgb for c in color))
+            + png_chunk(b"IDAT", zlib.compress(raw, 6)) + png_chunk(b"IEND", b""))
+
+def gif_bits(rgb):
+    """Bits per index in a GIF colour table big enough for rgb."""
+    return max(1, (len(rgb) - 1).bit_length())
+
+def gif_lzw(pixels, min_size):
+    """GIF's variable-width LZW over palette indices, codes packed low bit first."""
+    clear, end = 1 << min_size, (1 << min_size) + 1
+    table, next_code, size = {}, end + 1, min_size + 1
+    out, acc, nbits = bytearray(), clear, size # The stream opens with a clear code
+    prefix = pixels[0]
+    for b in pixels[1:]:
+        key = prefix << 8 | b
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        acc |= prefix << nbits; nbits += size
+        while nbits >= 8:
+            out.append(acc & 0xFF); acc >>= 8; nbits -= 8
+        if next_code < 4096:
+            if next_code == 1 << size: size += 1
+            table[key] = next_code; next_code += 1
+        else: # Table full: start over
+            acc |= clear << nbits; nbits += size
+            table, next_code, size = {}, end + 1, min_size + 1
+        prefix = b
+    for code in (prefix, end):
+        acc |= code << nbits; nbits += size
+        if code == prefix and next_code == 1 << size and size < 12: size += 1
+    while nbits > 0:
+        out.append(acc & 0xFF); acc >>= 8; nbits -= 8
+    return bytes(out)
+
+def encode_gif_frame(pixels, width, height, rgb, delay_ms):
+    """One GIF image: its delay, its descriptor, then LZW data in 255-byte sub-blocks."""
+    min_size = max(2, gif_bits(rgb))
+    data = gif_lzw(pixels, min_size)
+    blocks = b"".join(bytes((len(data[i:i + 255]),)) + data[i:i + 255] for i in range(0, len(data), 255))
+    return (b"\x21\xf9\x04\x04" + struct.pack("<H", round(delay_ms / 10)) + b"\x00\x00"
+            + b"\x2c" + struct.pack("<4HB", 0, 0, width, height, 0) + bytes((min_size,)) + blocks + b"\x00")
+
+def crop_frame(pixels, width, height):
+    """The smallest box around everything but background: (left, top, w, h, its pixels)."""
+    rows = [y for y in range(height) if pixels[y * width:(y + 1) * width].count(0) != width]
+    if not rows: return 0, 0, 1, 1, b"\0"
+    left, right = width, 0
+    for y in rows:
+        row = pixels[y * width:(y + 1) * width]
+        left = min(left, width - len(row.lstrip(b"\0")))
+        right = max(right, len(row.rstrip(b"\0")))
+    top, w, h = rows[0], right - left, rows[-1] + 1 - rows[0]
+    return left, top, w, h, b"".join(pixels[y * width + left:y * width + right] for y in range(top, top + h))
+
+_export_project = None # A worker's open project, kept across its jobs
+
+def export_chunk(job):
+    """Renders and encodes one run of frames (in a worker); returns what the parent writes for each."""
+    global _export_project
+    frames_ = job['frames']
+    if frames_ is None: # Read straight from the project file rather than being sent the frames
+        if _export_project is None or _export_project.path != job['project']:
+            _export_project = AnimProject(job['project'])
+        frames_ = [_export_project.frame(n) for n in range(job['first'], job['first'] + job['count'])]
+    width, height, rgb, results = job['width'], job['height'], job['rgb'], []
+    for n, frame in enumerate(frames_, job['first']):
+        pixels = rasterize_frame(frame, width, height, job['colors'])
+        if job['kind'] == "gif":
+            results.append(encode_gif_frame(pixels, width, height, rgb, job['frame_ms']))
+        elif job['kind'] == "sheet":
+            results.append(crop_frame(pixels, width, height))
+        else:
+            with open(job['pattern'].format(n), "wb") as f: f.write(encode_png(pixels, width, height, rgb))
+            results.append(None)
+    return results
+
+class AnimExport:
+    """An export under way: frames rendered and encoded by a process pool, written to path in order.
+
+    A .gif path gets an animated GIF, a .png path a packed sprite sheet with
+    a .json atlas beside it, and any other path a folder of numbered PNGs.
+    poll() writes whatever has come back without waiting, for the studio's
+    clock; run() waits for everything, for the command line.
+    """
+
+    def __init__(self, frames_, path, workers=None, background=False, frame_ms=None):
+        self.path, self.width, self.height, self.count = path, WIDTH, HEIGHT - ANIM_PANEL_H, len(frames_)
+        self.frame_ms = frame_ms or getattr(frames_, 'keyframe_ms', KEYFRAME_MS) # A project keeps its own spacing
+        lazy = isinstance(frames_, AnimProject) and frames_.order is None
+        if isinstance(frames_, AnimProject):
+            fills = set(frames_.fills) | {d['fill'] for f in (frames_.order or ()) if isinstance(f, dict) for d in f.values()}
+        else:
+            fills = {d['fill'] for f in frames_ for d in f.values()}
+        names = [ANIM_BG, "black"] + sorted(fills - {ANIM_BG, "black"})[:254] # One GIF/PNG palette
+        colors, self.rgb = {name: i for i, name in enumerate(names)}, [color_rgb(name) for name in names]
+        self.kind = "gif" if path.lower().endswith(".gif") else "sheet" if path.lower().endswith(".png") else "png"
+        if self.kind == "png": os.makedirs(path, exist_ok=True)
+        jobs = [{'kind': self.kind, 'first': first, 'count': min(EXPORT_CHUNK, self.count - first),
+                 'project': frames_.path if lazy else None,
+                 'frames': None if lazy else [frames_[n] for n in range(first, min(first + EXPORT_CHUNK, self.count))],
+                 'width': self.width, 'height': self.height, 'colors': colors, 'rgb': self.rgb, 'frame_ms': self.frame_ms,
+                 'pattern': os.path.join(path, "frame_{:05d}.png")} for first in range(0, self.count, EXPORT_CHUNK)]
+        workers = workers or os.cpu_count() or 1
+        # In the background even one worker gets a process of its own, so the window never waits on it
+        self.pool = ProcessPoolExecutor(workers) if background or (workers > 1 and len(jobs) > 1) else None
+        self.pending = deque(self.pool.submit(export_chunk, job) for job in jobs) if self.pool else deque(jobs)
+        self.done, self.crops, self.finished = 0, [], False
+        self.out = open(path, "wb") if self.kind == "gif" else None
+        if self.out:
+            bits = gif_bits(self.rgb)
+            self.out.write(b"GIF89a" + struct.pack("<2H3B", self.width, self.height, 0xF0 | (bits - 1), 0, 0))
+            self.out.write(bytes(c for color in self.rgb + [(0, 0, 0)] * ((1 << bits) - len(self.rgb)) for c in color))
+            self.out.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00") # Loop forever
+
+    def _next(self):
+        job = self.pending.popleft()
+        for encoded in (job.result() if self.pool else export_chunk(job)):
+            if self.kind == "gif": self.out.write(encoded)
+            elif self.kind == "sheet": self.crops.append(encoded)
+            self.done += 1
+
+    def poll(self):
+        """Writes the jobs that are ready, in order, without waiting; True once the export is complete."""
+        try:
+            while self.pending and (self.pool is None or self.pending[0].done()):
+                self._next()
+                if self.pool is None: break # Done here and now: one job per poll
+            if not self.pending: self._finish()
+        except BaseException:
+            self.cancel()
+            raise
+        return self.finished
+
+    def run(self, progress=None):
+        """Waits for every job, writing each as it comes; progress(done, total) after each."""
+        try:
+            while self.pending:
+                self._next()
+                if progress: progress(self.done, self.count)
+            self._finish()
+        except BaseException:
+            self.cancel()
+            raise
+
+    def _finish(self):
+        if self.finished: return
+        self.finished = True
+        if self.out:
+            self.out.write(b";")
+            self.out.close()
+        if self.pool: self.pool.shutdown()
+        if self.kind == "sheet": write_sprite_sheet(self.path, self.crops, self.width, self.height, self.rgb, self.frame_ms)
+
+    def cancel(self):
+        """Stops the export, leaving whatever was written so far."""
+        self.finished = True
+        self.pending.clear()
+        if self.out: self.out.close()
+        if self.pool: self.pool.shutdown(wait=False, cancel_futures=True)
+
+def export_animation(frames_, path, workers=None, progress=None, frame_ms=None):
+    """Exports frames_ to path and waits for it to finish (see AnimExport)."""
+    AnimExport(frames_, path, workers, frame_ms=frame_ms).run(progress)
+
+def write_sprite_sheet(path, crops, width, height, rgb, frame_ms=KEYFRAME_MS):
+    """Packs cropped frames onto shelves, tallest first, sharing one spot between identical frames."""
+    spots, placed, order = {}, [None] * len(crops), sorted(range(len(crops)), key=lambda n: -crops[n][3])
+    x = y = shelf_h = sheet_w = 0
+    for n in order:
+        left, top, w, h, pixels = crops[n]
+        spot = spots.get((w, h, pixels))
+        if spot is None:
+            if x and x + w > SHEET_MAX_W: x, y, shelf_h = 0, y + shelf_h, 0
+            spot = spots[(w, h, pixels)] = (x, y)
+            x += w; shelf_h = max(shelf_h, h); sheet_w = max(sheet_w, x)
+        placed[n] = {'x': spot[0], 'y': spot[1], 'w': w, 'h': h, 'offset_x': left, 'offset_y': top}
+    sheet_h = y + shelf_h
+    sheet = bytearray(sheet_w * sheet_h)
+    for (w, h, pixels), (sx, sy) in spots.items():
+        for row in range(h):
+            sheet[(sy + row) * sheet_w + sx:(sy + row) * sheet_w + sx + w] = pixels[row * w:(row + 1) * w]
+    with open(path, "wb") as f: f.write(encode_png(sheet, sheet_w, sheet_h, rgb))
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump({'size': [sheet_w, sheet_h], 'frame_size': [width, height], 'frame_ms': frame_ms,
+                   'frames': placed}, f, indent=1)
+
 def start_animation_studio():
     global state, frames, current_frame_index, animation_running, frame_index_text_id
-    state = "animation"; clear_game_tags(); canvas.config(bg="lightgray")
+    state = "animation"; clear_game_tags(); canvas.config(bg=ANIM_BG)
     
-    frames = [] # List of frame dictionary: {item_id: {type, coords, fill, ...}}
+    frames = [] # List of keyframe dictionaries: {shape id: {type, coords, fill}}
     current_frame_index = 0
     animation_running = False
     
     # Create control panel at the bottom
-    control_panel_h = 60
+    control_panel_h = ANIM_PANEL_H
     canvas.create_rectangle(0, HEIGHT - control_panel_h, WIDTH, HEIGHT, 
                             fill="gray80", outline="", tags=("anim_ui_bg",))
     
@@ -1314,14 +3281,14 @@ def start_animation_studio():
     x_offset = 10
     
     # Record Frame
-    b_record = tk.Button(root, text="Record Frame", bg="green", fg="white", 
+    b_record = make_button(text="Record Frame", bg="green", fg="white", 
                          command=animation_record_frame, font=("Arial", 10))
     ui_buttons.append(b_record)
     canvas.create_window(x_offset + 50, btn_y, window=b_record)
     x_offset += 120
 
     # Prev Frame
-    b_prev = tk.Button(root, text="< Prev", bg="blue", fg="white", 
+    b_prev = make_button(text="< Prev", bg="blue", fg="white", 
                        command=animation_prev_frame, font=("Arial", 10))
     ui_buttons.append(b_prev)
     canvas.create_window(x_offset + 30, btn_y, window=b_prev)
@@ -1334,36 +3301,53 @@ def start_animation_studio():
     x_offset += 80
     
     # Next Frame
-    b_next = tk.Button(root, text="Next >", bg="blue", fg="white", 
+    b_next = make_button(text="Next >", bg="blue", fg="white", 
                        command=animation_next_frame, font=("Arial", 10))
     ui_buttons.append(b_next)
     canvas.create_window(x_offset + 30, btn_y, window=b_next)
     x_offset += 60
     
     # Play/Stop
-    b_toggle = tk.Button(root, text="Play", bg="red", fg="white", 
+    b_toggle = make_button(text="Play", bg="red", fg="white", 
                          command=animation_toggle_play, font=("Arial", 10))
     ui_buttons.append(b_toggle)
     canvas.create_window(x_offset + 50, btn_y, window=b_toggle, tags=("anim_toggle_btn",))
-    x_offset += 120
+    x_offset += 100
+
+    # Playback rate and easing, both cycled in place
+    b_fps = make_button(text=f"{anim_fps} fps", bg="gray70", fg="black",
+                        command=lambda: animation_cycle_fps(b_fps), font=("Arial", 10))
+    ui_buttons.append(b_fps)
+    canvas.create_window(x_offset + 10, btn_y, window=b_fps)
+    b_ease = make_button(text=anim_ease.capitalize(), bg="gray70", fg="black",
+                         command=lambda: animation_toggle_ease(b_ease), font=("Arial", 10))
+    ui_buttons.append(b_ease)
+    canvas.create_window(x_offset + 62, btn_y, window=b_ease)
+
+    # Keyframe spacing, above the buttons
+    canvas.create_text(WIDTH - 10, HEIGHT - control_panel_h + 8, anchor="e", font=("Arial", 8), fill="black",
+                       tags=("keyframe_spacing", "anim_ui"))
+    show_keyframe_spacing()
 
     # Clear All
-    b_clear = tk.Button(root, text="Clear All", bg="gray", fg="black", 
+    b_clear = make_button(text="Clear All", bg="gray", fg="black", 
                         command=animation_clear_all, font=("Arial", 10))
     ui_buttons.append(b_clear)
     canvas.create_window(WIDTH - 50, btn_y, window=b_clear)
 
     # Initial Shapes (for manipulation)
-    canvas.create_oval(WIDTH//2 - 20, HEIGHT//2 - 20, WIDTH//2 + 20, HEIGHT//2 + 20, 
-                       fill="purple", tags=("anim_shape", "movable"))
-                       
-    canvas.create_rectangle(WIDTH//2 - 80, HEIGHT//2 + 50, WIDTH//2 - 40, HEIGHT//2 + 90, 
-                           fill="orange", tags=("anim_shape", "movable"))
+    add_default_shapes()
 
-    # Bind shape movement (drag and drop)
+    # Bind shape movement (drag and drop), once for every shape through their shared tag
     canvas.tag_bind("movable", "<Button-1>", animation_drag_start)
     canvas.tag_bind("movable", "<B1-Motion>", animation_drag_motion)
     canvas.tag_bind("movable", "<ButtonRelease-1>", animation_drag_end)
+    root.bind("<Control-s>", animation_save_project)
+    root.bind("<Control-o>", animation_open_project)
+    root.bind("<Control-e>", animation_export)
+    root.bind("<Control-d>", animation_duplicate_shapes)
+    root.bind("<Control-g>", animation_grid_fill)
+    root.bind("<Control-k>", animation_cycle_spacing)
     root.bind("<Escape>",to_menu) # No highscore for animation
 
     # Record the initial frame
@@ -1374,65 +3358,188 @@ def update_frame_display():
     global frame_index_text_id
     total_frames = max(1, len(frames))
     display_index = current_frame_index + 1
+    exporting = f"  Export {anim_export.done * 100 // max(1, anim_export.count)}%" if anim_export else ""
     # Check if frame_index_text_id exists before configuring
     if frame_index_text_id:
-        canvas.itemconfigure(frame_index_text_id, text=f"Frame: {display_index}/{total_frames}")
+        canvas.itemconfigure(frame_index_text_id, text=f"Frame: {display_index}/{total_frames}{exporting}")
 
 def animation_clear_display():
     """Clears non-UI shapes from the canvas."""
-    for item in canvas.find_withtag("anim_shape"):
-        canvas.delete(item)
+    global anim_base
+    canvas.delete("anim_shape")
+    anim_items.clear(); anim_shown.clear()
+    anim_base = None
+
+def create_anim_shape(kind, coords, fill, shape_id=None):
+    """Creates a shape under a stable shape id (a new one unless given); drag bindings come from its tag."""
+    global next_shape_id
+    if shape_id is None:
+        shape_id, next_shape_id = next_shape_id, next_shape_id + 1
+        anim_moved.add(shape_id) # The canvas now has a shape no frame knows about
+    create = canvas.create_oval if kind == 'oval' else canvas.create_rectangle
+    anim_items[shape_id] = create(*coords, fill=fill, tags=("anim_shape", "movable"))
+    return shape_id
+
+def anim_shape_moved(shape_id):
+    """Once moved a shape no longer shows its frame data, so the next frame load must set it again."""
+    anim_moved.add(shape_id)
+    anim_shown.pop(shape_id, None)
+
+def animation_duplicate_shapes(event=None):
+    """Copies every shape DUPLICATE_OFFSET down and right, doubling the shapes to animate."""
+    if state != "animation" or animation_running: return
+    for captured in canvas.item_states(list(anim_items.values()), "fill"):
+        kind, coords, fill = captured
+        create_anim_shape(kind, [c + DUPLICATE_OFFSET for c in coords], fill)
+    canvas.tag_raise("anim_ui_bg"); canvas.tag_raise("frame_display"); canvas.tag_raise("keyframe_spacing")
+
+def animation_grid_fill(event=None):
+    """Adds a GRID_FILL grid of small shapes across the stage, ovals and rectangles in turn."""
+    if state != "animation" or animation_running: return
+    cols, rows = GRID_FILL
+    cell_w, cell_h = WIDTH / cols, (HEIGHT - ANIM_PANEL_H) / rows
+    colours = ("purple", "orange", "blue", "green")
+    for row in range(rows):
+        for col in range(cols):
+            x, y = col * cell_w + 2, row * cell_h + 2
+            create_anim_shape(('oval', 'rectangle')[(row + col) % 2], (x, y, x + cell_w - 4, y + cell_h - 4),
+                              colours[(row + col) % len(colours)])
+    canvas.tag_raise("anim_ui_bg"); canvas.tag_raise("frame_display"); canvas.tag_raise("keyframe_spacing")
+
+def add_default_shapes():
+    create_anim_shape('oval', (WIDTH//2 - 20, HEIGHT//2 - 20, WIDTH//2 + 20, HEIGHT//2 + 20), "purple")
+    create_anim_shape('rectangle', (WIDTH//2 - 80, HEIGHT//2 + 50, WIDTH//2 - 40, HEIGHT//2 + 90), "orange")
+
+def frame_delta(old, new):
+    """Shape ids whose data differs from frame old to frame new, worked out once per pair.
+
+    Frames share one data dict for a shape that did not change between
+    them, so the check is by identity.
+    """
+    if old is new: return []
+    cached = frame_deltas.get((id(old), id(new)))
+    if cached is None or cached[0] is not old or cached[1] is not new:
+        changed = [s for s, data in new.items() if old.get(s) is not data] + [s for s in old if s not in new]
+        cached = remember_delta(old, new, changed)
+    return cached[2]
+
+def remember_delta(old, new, changed):
+    cached = frame_deltas[(id(old), id(new))] = (old, new, changed)
+    if len(frame_deltas) > FRAME_PAIR_CACHE: del frame_deltas[next(iter(frame_deltas))]
+    return cached
 
 def animation_load_frame(index):
-    """Loads a specific frame index onto the canvas."""
-    global current_frame_index
+    """Loads a specific frame index onto the canvas, touching only the shapes that differ.
+
+    Coming from a frame the canvas shows exactly, only that pair's delta is
+    looked at, so a playback step costs what changed between the frames.
+    """
+    global current_frame_index, anim_base, anim_moved, anim_elapsed
     if not frames or index < 0 or index >= len(frames): return
 
     current_frame_index = index
-    animation_clear_display()
-    
     frame_data = frames[index]
+    created = False
+    moved_off, anim_moved, anim_elapsed = anim_moved, set(), 0
     
-    for _, data in frame_data.items():
-        if data['type'] == 'oval':
-            item = canvas.create_oval(*data['coords'], fill=data['fill'], tags=("anim_shape", "movable"))
-        elif data['type'] == 'rectangle':
-            item = canvas.create_rectangle(*data['coords'], fill=data['fill'], tags=("anim_shape", "movable"))
-            
-        # Bind events to the newly created shapes
-        canvas.tag_bind(item, "<Button-1>", animation_drag_start)
-        canvas.tag_bind(item, "<B1-Motion>", animation_drag_motion)
-        canvas.tag_bind(item, "<ButtonRelease-1>", animation_drag_end)
+    with profiler.phase("diff"):
+        if anim_base is not None:
+            changed = frame_delta(anim_base, frame_data)
+        else:
+            changed = list(frame_data) + [s for s in anim_items if s not in frame_data]
+        for shape_id in list(moved_off) + changed:
+            data = frame_data.get(shape_id)
+            if data is None:
+                if shape_id in anim_items: canvas.delete(anim_items.pop(shape_id))
+                anim_shown.pop(shape_id, None)
+                continue
+            shown = anim_shown.get(shape_id)
+            moved = shape_id in moved_off
+            if moved: moved_off.discard(shape_id) # Set once; a second visit is an ordinary one
+            elif shown is data: continue
+            item = anim_items.get(shape_id)
+            if item is None:
+                create_anim_shape(data['type'], data['coords'], data['fill'], shape_id)
+                created = True
+            else:
+                if shown is None or moved or shown['coords'] != data['coords']: canvas.coords(item, *data['coords'])
+                if shown is None or shown['fill'] != data['fill']: canvas.itemconfigure(item, fill=data['fill'])
+            anim_shown[shape_id] = data
+    anim_base = frame_data
         
-    # Ensure UI is on top
-    canvas.tag_raise("anim_ui_bg")
-    canvas.tag_raise("frame_display")
+    if created:
+        # Ensure UI is on top
+        canvas.tag_raise("anim_ui_bg")
+        canvas.tag_raise("frame_display")
+        canvas.tag_raise("keyframe_spacing")
     
     update_frame_display()
 
 
+def frame_tween(old, new):
+    """The shapes that move from keyframe old to new, with their start rows and row deltas.
+
+    Worked out once per pair, so each in-between is one array step over the
+    moving shapes; shapes that only change colour switch at the keyframe.
+    """
+    key = (id(old), id(new))
+    cached = frame_tweens.get(key)
+    if cached is None or cached[0] is not old or cached[1] is not new:
+        ids = [s for s in frame_delta(old, new) if s in old and s in new
+               and old[s]['coords'] != new[s]['coords'] and len(old[s]['coords']) == len(new[s]['coords'])]
+        start = [old[s]['coords'] for s in ids]
+        delta = [[b - a for a, b in zip(old[s]['coords'], new[s]['coords'])] for s in ids]
+        if np is not None and ids: start, delta = np.array(start, dtype=float), np.array(delta, dtype=float)
+        cached = frame_tweens[key] = (old, new, ids, start, delta)
+        if len(frame_tweens) > FRAME_PAIR_CACHE: del frame_tweens[next(iter(frame_tweens))]
+    return cached[2:]
+
+def animation_show_tween(u):
+    """Shows the in-between a fraction u of the way from the current keyframe to the next."""
+    if anim_base is not frames[current_frame_index]: return # The canvas is not on its keyframe
+    ids, start, delta = frame_tween(anim_base, frames[(current_frame_index + 1) % len(frames)])
+    if not ids: return
+    e = EASINGS[anim_ease](u)
+    with profiler.phase("tween"):
+        if np is not None:
+            rows = (start + delta * e).tolist()
+        else:
+            rows = [[a + d * e for a, d in zip(row, drow)] for row, drow in zip(start, delta)]
+        canvas.set_coords([anim_items[s] for s in ids], rows)
+        anim_moved.update(ids) # The next keyframe load puts them back on their data
+
 def animation_record_frame():
-    """Captures the current state of 'anim_shape' objects and saves it as a new frame."""
+    """Captures the current state of 'anim_shape' objects and saves it as a new frame.
+
+    Starting from the frame last loaded, only shapes moved or added since
+    are read back, all in one batched read of the scene model; the rest
+    share that frame's data.
+    """
     global frames, current_frame_index
     
-    current_frame_state = {}
+    base = anim_base
+    if base is not None:
+        current_frame_state = dict(base) # Shapes only go with a frame load, so all of these are still here
+        shape_ids = [s for s in anim_moved if s in anim_items]
+    else:
+        current_frame_state, shape_ids = {}, list(anim_items)
     
-    # Collect data on all currently displayed movable shapes
-    for item_id in canvas.find_withtag("anim_shape"):
-        try:
-            item_type = canvas.type(item_id)
-            coords = canvas.coords(item_id)
-            fill_color = canvas.itemcget(item_id, "fill")
-            
+    # Collect data on the shapes that may have changed
+    for shape_id, captured in zip(shape_ids, canvas.item_states([anim_items[s] for s in shape_ids], "fill")):
+        if captured is None: continue # Skip deleted items
+        kind, coords, fill_color = captured
+        anim_moved.discard(shape_id) # It shows what is captured below from here on
+        shown = anim_shown.get(shape_id)
+        if shown is not None and shown['coords'] == coords and shown['fill'] == fill_color:
+            current_frame_state[shape_id] = shown # Unchanged: share the data, so playback skips it
+        else:
             # Save relevant data for reconstruction
-            current_frame_state[item_id] = {
-                'type': item_type,
-                'coords': coords,
+            current_frame_state[shape_id] = anim_shown[shape_id] = {
+                'type': kind,
+                'coords': list(coords),
                 'fill': fill_color,
                 # Add more properties if needed (e.g., outline, width)
             }
-        except tk.TclError:
-            continue # Skip deleted items
 
     if not current_frame_state and frames:
         # Prevent recording an empty frame if shapes were deleted, unless it's the first frame
@@ -1441,9 +3548,11 @@ def animation_record_frame():
     # If the animation is playing, stop it first
     animation_toggle_play(stop_only=True)
 
-    # Insert the new frame after the current one
-    frames.insert(current_frame_index + 1, current_frame_state)
-    current_frame_index += 1
+    # Insert the new frame after the current one (the very first frame goes at 0)
+    current_frame_index = min(current_frame_index + 1, len(frames))
+    frames.insert(current_frame_index, current_frame_state)
+    if base is not None: # Its delta from base is known already: only the shapes read back can differ
+        remember_delta(base, current_frame_state, [s for s in shape_ids if current_frame_state.get(s) is not base.get(s)])
     
     # Reload to ensure the canvas reflects the saved state and updates the display
     animation_load_frame(current_frame_index)
@@ -1462,7 +3571,7 @@ def animation_next_frame():
         animation_load_frame(new_index)
 
 def animation_toggle_play(stop_only=False):
-    global animation_running, after_ids
+    global animation_running
     
     # Find the Play/Stop button widget
     toggle_btn_window = canvas.find_withtag("anim_toggle_btn")
@@ -1482,10 +3591,7 @@ def animation_toggle_play(stop_only=False):
     if animation_running or stop_only:
         # Stop animation
         animation_running = False
-        for aid in after_ids:
-            try: root.after_cancel(aid)
-            except: pass
-        after_ids.clear()
+        clock.cancel("animation")
         
         if toggle_btn: toggle_btn.config(text="Play", bg="red")
         
@@ -1500,37 +3606,127 @@ def animation_toggle_play(stop_only=False):
         # Start animation
         animation_running = True
         if toggle_btn: toggle_btn.config(text="Stop", bg="orange")
-        animation_update_loop()
+        animation_load_frame(current_frame_index) # Start from the keyframe itself
+        animation_start_loop()
+
+def animation_start_loop():
+    """Steps playback every frame period, the first one period from now."""
+    period = 1000 // anim_fps
+    clock.every(period, animation_update_loop, group="animation", delay_ms=period)
 
 def animation_update_loop():
-    global current_frame_index
+    global current_frame_index, anim_elapsed
     if state != "animation" or not animation_running: 
+        return False
+
+    # In-betweens until the next keyframe is due, by playback time so every rate keeps the spacing
+    anim_elapsed += 1000 // anim_fps
+    if anim_elapsed < anim_keyframe_ms:
+        animation_show_tween(anim_elapsed / anim_keyframe_ms)
         return
 
-    # Cycle to the next frame
+    # Cycle to the next keyframe
     current_frame_index = (current_frame_index + 1) % len(frames)
     
     # Load and display the new frame
     animation_load_frame(current_frame_index)
-    
-    # Continue the loop
-    aid = root.after(100, animation_update_loop) # Playback speed (10 FPS)
-    after_ids.append(aid)
+
+def animation_cycle_fps(button):
+    """Steps the playback rate through ANIM_FPS_CHOICES; keyframe timing is unchanged."""
+    global anim_fps, anim_elapsed
+    anim_fps = ANIM_FPS_CHOICES[(ANIM_FPS_CHOICES.index(anim_fps) + 1) % len(ANIM_FPS_CHOICES)]
+    button.config(text=f"{anim_fps} fps")
+    if animation_running:
+        clock.cancel("animation")
+        anim_elapsed -= anim_elapsed % (1000 // anim_fps) # Back onto the new rate's frames
+        animation_start_loop()
+
+def animation_cycle_spacing(event=None):
+    """Steps the time between keyframes through KEYFRAME_MS_CHOICES (Ctrl+K)."""
+    global anim_keyframe_ms
+    if state != "animation": return
+    later = [ms for ms in KEYFRAME_MS_CHOICES if ms > anim_keyframe_ms]
+    anim_keyframe_ms = later[0] if later else KEYFRAME_MS_CHOICES[0]
+    show_keyframe_spacing()
+
+def show_keyframe_spacing():
+    canvas.itemconfigure("keyframe_spacing", text=f"Keyframes {anim_keyframe_ms / 1000:g} s apart (Ctrl+K)")
+
+def animation_save_project(event=None):
+    """Saves the frames to ANIM_PROJECT_FILE, then carries on from the saved file."""
+    global frames, anim_base
+    if state != "animation" or not frames or anim_export is not None: return # Workers may be reading the file
+    animation_toggle_play(stop_only=True)
+    save_project(ANIM_PROJECT_FILE + ".tmp", frames, anim_keyframe_ms)
+    close_project() # The old file is replaced below
+    os.replace(ANIM_PROJECT_FILE + ".tmp", ANIM_PROJECT_FILE)
+    frames, anim_base = AnimProject(ANIM_PROJECT_FILE), None
+    status(f"Saved {len(frames)} frames to {ANIM_PROJECT_FILE}")
+
+def close_project():
+    """Closes the project file the frames are read from, if any, before they are replaced."""
+    if isinstance(frames, AnimProject): frames.close()
+
+def animation_open_project(event=None):
+    """Opens ANIM_PROJECT_FILE; its frames decode as playback reaches them."""
+    global frames, current_frame_index, next_shape_id, anim_keyframe_ms
+    if state != "animation" or anim_export is not None: return
+    try:
+        project = AnimProject(ANIM_PROJECT_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Could not open {ANIM_PROJECT_FILE}: {e}")
+        return
+    animation_toggle_play(stop_only=True)
+    animation_clear_display()
+    close_project()
+    frames, current_frame_index, anim_keyframe_ms = project, 0, project.keyframe_ms
+    show_keyframe_spacing()
+    next_shape_id = max((shape_id for shape_id, _ in project.shapes), default=0) + 1
+    animation_load_frame(0)
+    update_frame_display()
+    status(f"Opened {len(frames)} frames from {ANIM_PROJECT_FILE}")
+
+def animation_export(event=None):
+    """Starts exporting the frames to ANIM_EXPORT_FILE in the background; the studio stays usable."""
+    global anim_export
+    if state != "animation" or not frames or anim_export is not None: return
+    anim_export = AnimExport(frames, ANIM_EXPORT_FILE, background=True, frame_ms=anim_keyframe_ms)
+    clock.every(100, animation_export_poll, group="export")
+    update_frame_display()
+
+def animation_export_poll():
+    """Writes out whatever the export workers have finished, and the progress next to the frame counter."""
+    global anim_export
+    if anim_export is None: return False
+    try:
+        finished = anim_export.poll()
+    except Exception:
+        anim_export = None
+        update_frame_display()
+        raise # Reported by the clock, which drops this task
+    if finished:
+        status(f"Exported {anim_export.count} frames to {ANIM_EXPORT_FILE}")
+        anim_export = None
+    update_frame_display()
+    if finished: return False
+
+def animation_toggle_ease(button):
+    global anim_ease
+    anim_ease = "ease" if anim_ease == "linear" else "linear"
+    button.config(text=anim_ease.capitalize())
 
 def animation_clear_all():
     global frames, current_frame_index
     animation_toggle_play(stop_only=True)
+    close_project()
     frames = []
     current_frame_index = 0
+    frame_deltas.clear(); frame_tweens.clear()
     animation_clear_display()
     update_frame_display()
     
     # Recreate default movable shapes
-    canvas.create_oval(WIDTH//2 - 20, HEIGHT//2 - 20, WIDTH//2 + 20, HEIGHT//2 + 20, 
-                       fill="purple", tags=("anim_shape", "movable"))
-                       
-    canvas.create_rectangle(WIDTH//2 - 80, HEIGHT//2 + 50, WIDTH//2 - 40, HEIGHT//2 + 90, 
-                           fill="orange", tags=("anim_shape", "movable"))
+    add_default_shapes()
     
     animation_record_frame() # Record the new initial state
     
@@ -1549,6 +3745,8 @@ def animation_drag_start(event):
         drag_data["item"] = item[0]
         drag_data["x"] = event.x
         drag_data["y"] = event.y
+        for shape_id, shape_item in anim_items.items():
+            if shape_item == item[0]: anim_shape_moved(shape_id); break
 
 def animation_drag_motion(event):
     global drag_data
@@ -1580,8 +3778,656 @@ def animation_drag_end(event):
     drag_data["y"] = 0
 
 
-# ---------- Start the application ----------
-show_menu()
-root.mainloop()
+# ---------- Benchmarks ----------
+def bench_collisions(counts=(50, 100, 200, 400, 800, 1600), ticks=40):
+    """Per-tick cost of bullet-vs-target checks: every pair against the SpatialHash."""
+    print(f"{'entities':>8} {'all pairs ms':>13} {'grid ms':>9}")
+    for n in counts:
+        rand = random.Random(n)
+        bullets_ = [[rand.uniform(0, WIDTH), rand.uniform(0, HEIGHT)] for _ in range(n // 4)]
+        targets = [[rand.uniform(0, WIDTH), rand.uniform(0, HEIGHT)] for _ in range(n - n // 4)]
+
+        def advance():
+            for p in bullets_: p[1] = (p[1] - 18) % HEIGHT
+            for p in targets: p[1] = (p[1] + 9) % HEIGHT
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            advance()
+            for bx, by in bullets_:
+                bbox = (bx, by, bx + 4, by + 15)
+                for tx, ty in targets:
+                    if boxes_overlap((tx, ty, tx + 30, ty + 30), bbox): break
+        naive_ms = (time.perf_counter() - start) * 1000 / ticks
+
+        grid = SpatialHash()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            advance()
+            for i, (tx, ty) in enumerate(targets): grid.update(("t", i), (tx, ty, tx + 30, ty + 30), "target")
+            for bx, by in bullets_: grid.first_hit((bx, by, bx + 4, by + 15), "target")
+        grid_ms = (time.perf_counter() - start) * 1000 / ticks
+        print(f"{n:>8} {naive_ms:>13.3f} {grid_ms:>9.3f}")
+
+def bench_particles(counts=(100, 400, 1600, 6400), steps=15):
+    """Per-step cost of the particle system as the number of live particles grows."""
+    print(f"NumPy: {'yes' if np is not None else 'no (list fallback)'}")
+    print(f"{'particles':>9} {'ms/step':>8}")
+    for n in counts:
+        clear_game_tags()
+        for _ in range(n // 40): large_explosion(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT))
+        particles._merge()
+        start = time.perf_counter()
+        for _ in range(steps): particles.step()
+        print(f"{n:>9} {(time.perf_counter() - start) * 1000 / steps:>8.3f}")
+    clear_game_tags()
+
+def bench_snake(sizes=(32, 128, 512, 1024), fills=(0.1, 0.5, 0.9, 0.999), steps=100):
+    """Cost of a Snake move and a food spawn as the board fills, old list engine vs SnakeBoard.
+
+    The snake lies along a serpentine path that covers the whole board and
+    keeps moving along it. The list engine is only timed up to 128x128, as
+    beyond that it takes minutes; on a full board its food spawn never ends.
+    """
+    print(f"{'grid':>9} {'fill':>6} {'list move us':>12} {'list food us':>12} {'board move us':>13} {'board food us':>13}")
+    for n in sizes:
+        path = [y * n + (x if y % 2 == 0 else n - 1 - x) for y in range(n) for x in range(n)]
+        for fill in fills:
+            length = min(int(n * n * fill), n * n - steps - 1)
+            moves = [(path[k + 1] % n - path[k] % n, path[k + 1] // n - path[k] // n) for k in range(length - 1, length - 1 + steps)]
+            rand = random.Random(n)
+
+            board = SnakeBoard(n, n)
+            board.place(reversed(path[:length]))
+            start = time.perf_counter()
+            for dx, dy in moves: board.step(dx, dy)
+            board_move = (time.perf_counter() - start) * 1e6 / steps
+            start = time.perf_counter()
+            for _ in range(steps): board.spawn_food(rand)
+            board_food = (time.perf_counter() - start) * 1e6 / steps
+
+            list_move = list_food = None
+            if n <= 128:
+                # The engine this replaced: [x, y] lists, a slice scan, insert(0) and rejection sampling
+                cells = [[c % n, c // n] for c in reversed(path[:length])]
+                start = time.perf_counter()
+                for dx, dy in moves:
+                    hx, hy = cells[0]
+                    head = [hx + dx, hy + dy]
+                    if head in cells[1:]: break
+                    cells.insert(0, head)
+                    cells.pop()
+                list_move = (time.perf_counter() - start) * 1e6 / steps
+                start = time.perf_counter()
+                for _ in range(steps):
+                    while True:
+                        fx, fy = rand.randint(0, n - 1), rand.randint(0, n - 1)
+                        if not any(c[0] == fx and c[1] == fy for c in cells): break
+                list_food = (time.perf_counter() - start) * 1e6 / steps
+
+            shown = lambda v: f"{v:.2f}" if v is not None else "--"
+            print(f"{f'{n}x{n}':>9} {length / (n * n):>6.1%} {shown(list_move):>12} {shown(list_food):>12} {board_move:>13.2f} {board_food:>13.2f}")
+
+def bench_balls(counts=(1, 10, 50, 100, 200, 300, 400, 500), frames=300):
+    """Frame time of Breakout stress mode as the ball count grows.
+
+    Every frame runs one ball step plus the render hooks; the budget for
+    60 FPS is 16.7 ms. Headless this is the simulation and canvas mirror
+    only, not Tk's own drawing.
+    """
+    print(f"NumPy: {'yes' if np is not None else 'no (list fallback)'}")
+    print(f"{'balls':>6} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7} {'over 16.7':>9}")
+    for n in counts:
+        with redirect_stdout(io.StringIO()):
+            new_session(1)
+            start_breakout(n, stress=True)
+        times = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            clock.frame(30)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        over = sum(t > 1000 / 60 for t in times) / frames
+        print(f"{n:>6} {times[frames // 2]:>7.2f} {times[frames * 95 // 100]:>7.2f} {times[-1]:>7.2f} {over:>9.1%}")
+    with redirect_stdout(io.StringIO()): to_menu()
+
+def bench_terrain(distances=(0, 10 ** 4, 10 ** 6, 10 ** 9), speeds=(6, 60, 600), frames=300):
+    """Flight frame time and terrain memory far out along the world and at high speed.
+
+    The plane flies above the rooftops so nothing ends the run; speed is set
+    through the score, as in the game.
+    """
+    global score
+    print(f"{'distance':>10} {'speed':>6} {'ms/frame':>9} {'max ms':>7} {'chunks':>6} {'built':>6} {'items':>6}")
+    for d in distances:
+        for v in speeds:
+            with redirect_stdout(io.StringIO()):
+                new_session(1)
+                start_flight()
+            score = (v - 6) * 10
+            camera.x = terrain.scored_x = d
+            plane_pos[:] = [d + WIDTH // 3, 100]
+            times = []
+            for _ in range(frames):
+                start = time.perf_counter()
+                clock.frame(FRAME_MS)
+                times.append((time.perf_counter() - start) * 1000)
+            print(f"{d:>10} {flight_speed:>6} {sum(times) / frames:>9.3f} {max(times):>7.2f}"
+                  f" {len(terrain.chunks):>6} {terrain.built:>6} {len(canvas.items):>6}")
+    with redirect_stdout(io.StringIO()): to_menu()
+
+def bench_pbots(counts=(2, 10, 50, 100, 200), threat_count=60, ticks=50):
+    """P-Bot targeting per tick: every bot scanning every threat vs one ThreatIndex.
+
+    Threats are scattered over the sky at fixed positions; both ways must
+    pick the same target for every bot.
+    """
+    print(f"{'bots':>5} {'threats':>7} {'scan ms':>8} {'index ms':>9} {'ai phase ms':>11} {'same':>5}")
+    for n in counts:
+        with redirect_stdout(io.StringIO()):
+            new_session(1)
+            start_asteroid(n)
+        for _ in range(threat_count):
+            size, x, y = rng.randint(20, 40), rng.randint(0, WIDTH - 40), rng.randint(0, HEIGHT - 200)
+            if rng.random() < 0.8:
+                asteroids.append(pools["oval"].acquire(x, y, x + size, y + size, fill="darkgray"))
+            else:
+                enemies.append(pools["rectangle"].acquire(x, y, x + 30, y + 15, fill="blue", tags=("enemy",)))
+        tops = [canvas.bbox(p['id'])[1] for p in pbots]
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            # The scan this replaced: asteroids + enemies rebuilt and walked per bot
+            scanned = []
+            for top in tops:
+                closest, min_dist = None, HEIGHT * 2
+                for threat in asteroids + enemies:
+                    coords = canvas.coords(threat)
+                    if coords and coords[3] < top and top - coords[3] < min_dist:
+                        min_dist, closest = top - coords[3], (coords[0] + coords[2]) // 2
+                scanned.append(closest)
+        scan_ms = (time.perf_counter() - start) * 1000 / ticks
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            threats = ThreatIndex(asteroids + enemies)
+            indexed = [threats.above(top) for top in tops]
+        index_ms = (time.perf_counter() - start) * 1000 / ticks
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            threats = ThreatIndex(asteroids + enemies)
+            for pbot in pbots: pbot_move_logic(pbot, threats)
+        ai_ms = (time.perf_counter() - start) * 1000 / ticks
+        print(f"{n:>5} {len(asteroids) + len(enemies):>7} {scan_ms:>8.3f} {index_ms:>9.3f} {ai_ms:>11.3f} {'yes' if scanned == indexed else 'NO':>5}")
+    with redirect_stdout(io.StringIO()): to_menu()
+
+def bench_drawing(checkpoints=(10, 100, 1000), points=50):
+    """Drawing Studio cost per pointer event, and canvas items, as strokes pile up."""
+    with redirect_stdout(io.StringIO()):
+        new_session(1)
+        start_drawing()
+    print(f"{'strokes':>8} {'items':>6} {'motion us':>10} {'release ms':>11}")
+    drawn, motion_s, release_s = 0, 0.0, 0.0
+    for target in checkpoints:
+        motion_s = release_s = 0.0
+        strokes = target - drawn
+        while drawn < target:
+            x0, y0 = rng.uniform(20, WIDTH - 20), rng.uniform(20, HEIGHT - 80)
+            canvas.send("<Button-1>", x0, y0)
+            start = time.perf_counter()
+            for k in range(points):
+                canvas.send("<B1-Motion>", x0 + 60 * math.sin(k / 7 + drawn), y0 + 40 * math.cos(k / 5))
+            motion_s += time.perf_counter() - start
+            start = time.perf_counter()
+            canvas.send("<ButtonRelease-1>", x0, y0)
+            release_s += time.perf_counter() - start
+            drawn += 1
+        print(f"{drawn:>8} {len(canvas.items):>6} {motion_s * 1e6 / (strokes * points):>10.2f} {release_s * 1000 / strokes:>11.3f}")
+    with redirect_stdout(io.StringIO()): to_menu()
+
+def bench_animation(shape_counts=(10, 100, 1000), frame_count=20, loads=200):
+    """Animation playback cost per frame, with one shape or every shape changing between keyframes.
+
+    The last column is one tweened in-between with every shape moving.
+    """
+    print(f"{'shapes':>6} {'1 moved ms':>11} {'all moved ms':>13} {'tween ms':>9}")
+    for n in shape_counts:
+        row = []
+        for moved in (1, n):
+            with redirect_stdout(io.StringIO()):
+                new_session(1)
+                start_animation_studio()
+                for _ in range(n - len(anim_items)):
+                    x, y = rng.uniform(0, WIDTH - 20), rng.uniform(0, HEIGHT - 80)
+                    create_anim_shape(rng.choice(('oval', 'rectangle')), (x, y, x + 20, y + 20), "purple")
+                for f in range(frame_count):
+                    for shape_id in list(anim_items)[:moved]:
+                        canvas.move(anim_items[shape_id], 3, 0)
+                        anim_shape_moved(shape_id) # As dragging does
+                    animation_record_frame()
+            start = time.perf_counter()
+            # Frame 0 is the studio's opening frame with only the default shapes
+            for k in range(loads): animation_load_frame(1 + k % (len(frames) - 1))
+            row.append((time.perf_counter() - start) * 1000 / loads)
+        animation_load_frame(1)
+        start = time.perf_counter()
+        for k in range(loads): animation_show_tween((k % 10 + 1) / 11)
+        row.append((time.perf_counter() - start) * 1000 / loads)
+        print(f"{n:>6} {row[0]:>11.3f} {row[1]:>13.3f} {row[2]:>9.3f}")
+    with redirect_stdout(io.StringIO()): to_menu()
+
+def bench_record(shape_counts=(10, 100, 1000), records=20):
+    """Record Frame cost as shapes are added with grid fill and duplicate, one or every shape dragged first."""
+    print(f"{'shapes':>6} {'1 moved ms':>11} {'all moved ms':>13}")
+    for n in shape_counts:
+        row = []
+        for everyone in (False, True):
+            with redirect_stdout(io.StringIO()):
+                new_session(1)
+                start_animation_studio()
+                if n >= GRID_FILL[0] * GRID_FILL[1]: animation_grid_fill()
+                while len(anim_items) * 2 <= n: animation_duplicate_shapes()
+                for _ in range(n - len(anim_items)): create_anim_shape('oval', (0, 0, 10, 10), "purple")
+                animation_record_frame()
+                start = time.perf_counter()
+                for _ in range(records):
+                    for shape_id in (list(anim_items) if everyone else list(anim_items)[:1]):
+                        canvas.move(anim_items[shape_id], 1, 0)
+                        anim_shape_moved(shape_id) # As dragging does
+                    animation_record_frame()
+            row.append((time.perf_counter() - start) * 1000 / records)
+        print(f"{n:>6} {row[0]:>11.3f} {row[1]:>13.3f}")
+    with redirect_stdout(io.StringIO()): to_menu()
+
+def bench_project(frame_counts=(100, 1000, 10000), shape_count=50, moving=5, reads=2000):
+    """Animation project files: size, open time, and decode cost and memory as frames are read."""
+    print(f"{'frames':>6} {'list KiB':>9} {'file KiB':>9} {'open ms':>8} {'next ms':>8} {'seek ms':>8} {'held KiB':>9}")
+    rand = random.Random(1)
+    for n in frame_counts:
+        tracemalloc.start()
+        frame = {s: {'type': 'oval', 'coords': [rand.uniform(0, WIDTH)] * 4, 'fill': "purple"} for s in range(shape_count)}
+        built = []
+        for _ in range(n):
+            frame = dict(frame)
+            for s in rand.sample(range(shape_count), moving):
+                frame[s] = dict(frame[s], coords=[c + rand.uniform(-3, 3) for c in frame[s]['coords']])
+            built.append(frame)
+        list_kib = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "bench.ctanim")
+            save_project(path, built)
+            del built, frame
+            tracemalloc.start()
+            start = time.perf_counter()
+            project = AnimProject(path)
+            open_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for k in range(reads): project[k % n] # Playback order
+            next_ms = (time.perf_counter() - start) * 1000 / reads
+            start = time.perf_counter()
+            for _ in range(reads): project[rand.randrange(n)]
+            seek_ms = (time.perf_counter() - start) * 1000 / reads
+            held_kib = tracemalloc.get_traced_memory()[0] / 1024
+            tracemalloc.stop()
+            file_kib = os.path.getsize(path) / 1024
+            project.close()
+        print(f"{n:>6} {list_kib:>9.0f} {file_kib:>9.0f} {open_ms:>8.2f} {next_ms:>8.3f} {seek_ms:>8.3f} {held_kib:>9.0f}")
+
+def bench_export(frame_count=48, shape_count=30):
+    """Animation export time to each format as worker processes are added."""
+    counts = sorted({1, 2, os.cpu_count() or 1})
+    print(f"{'workers':>7} " + " ".join(f"{kind + ' s':>9}" for kind in ("gif", "png", "sheet")))
+    rand = random.Random(1)
+    frame = {s: {'type': rand.choice(('oval', 'rectangle')), 'coords': [0, 0, 0, 0], 'fill': rand.choice(list(NAMED_COLORS))}
+             for s in range(shape_count)}
+    built = []
+    for n in range(frame_count):
+        frame = dict(frame)
+        for s in frame:
+            x = (s * 53 + n * 7) % (WIDTH - 40); y = (s * 31) % (HEIGHT - ANIM_PANEL_H - 40)
+            frame[s] = dict(frame[s], coords=[x, y, x + 40, y + 30])
+        built.append(frame)
+    with tempfile.TemporaryDirectory() as folder:
+        for workers in counts:
+            row = []
+            for target in ("out.gif", "frames", "sheet.png"):
+                start = time.perf_counter()
+                export_animation(built, os.path.join(folder, f"{workers}-{target}"), workers)
+                row.append(time.perf_counter() - start)
+            print(f"{workers:>7} " + " ".join(f"{t:>9.2f}" for t in row))
+
+# --- Benchmark suite: every mode played by a script ---
+# Each script is called once per tick with the tick number and plays through
+# the same bindings a player uses, so a seeded run is exactly repeatable.
+
+def press_button(text):
+    """Clicks the on-screen button labelled text (headless widgets only)."""
+    for b in ui_buttons:
+        if getattr(b, "options", {}).get("text") == text: return b.invoke()
+
+def bbox_center(item):
+    x1, y1, x2, y2 = canvas.bbox(item)
+    return (x1 + x2) // 2, (y1 + y2) // 2
+
+def script_earthprotector(t):
+    if not ship_id or t % 4 or not canvas.bbox(ship_id): return
+    if t % 12 == 0: root.send("<space>")
+    if asteroids:
+        # Chase the lowest asteroid
+        ax = bbox_center(max(asteroids, key=lambda a: canvas.coords(a)[1]))[0]
+        sx = bbox_center(ship_id)[0]
+        if abs(ax - sx) > 10: root.send("<Left>" if ax < sx else "<Right>")
+
+def script_flight(t):
+    if t % 10: return
+    root.send("<Up>" if (t // 200) % 2 else "<Down>")
+    if t % 2000 == 1000: root.send("<c>")
+
+def script_clicker(t):
+    if t % 5 or not clickbtn_id or not canvas.bbox(clickbtn_id): return
+    x, y = bbox_center(clickbtn_id)
+    canvas.send("<Button-1>", x, y); canvas.send("<ButtonRelease-1>", x, y)
+
+def script_breakout(t):
+    if t % 3 or not balls or not balls.ids or not paddle_id: return
+    # Follow the lowest ball
+    c = balls.cols
+    low = max(range(len(balls.ids)), key=lambda i: c["y"][i])
+    bx, px = c["x"][low] + c["w"][low] / 2, bbox_center(paddle_id)[0]
+    if abs(bx - px) > 10: root.send("<Left>" if bx < px else "<Right>")
+
+def script_snake(t):
+    if t % 5 or not snake or is_game_over or snake.food is None: return
+    # Greedy: the free neighbouring cell closest to the food
+    cols = snake.cols
+    hx, hy = snake.body[0] % cols, snake.body[0] // cols
+    fx, fy = snake.food % cols, snake.food // cols
+    moves = []
+    for dx, dy, key in ((0, -1, "<Up>"), (0, 1, "<Down>"), (-1, 0, "<Left>"), (1, 0, "<Right>")):
+        nx, ny = hx + dx, hy + dy
+        if 0 <= nx < cols and 0 <= ny < snake.rows and not snake.is_occupied(ny * cols + nx):
+            moves.append((abs(nx - fx) + abs(ny - fy), key))
+    if moves: root.send(min(moves)[1])
+
+def script_drawing(t):
+    phase = t % 60
+    x = 50 + (t * 7) % (WIDTH - 100)
+    y = 60 + 40 * math.sin(t / 9) + (t // 60 % 8) * 45
+    if phase == 0: canvas.send("<Button-1>", x, y)
+    elif phase < 50: canvas.send("<B1-Motion>", x, y)
+    elif phase == 50: canvas.send("<ButtonRelease-1>", x, y)
+    if t % 3000 == 2999: press_button("Clear")
+
+def script_animation(t):
+    phase = t % 100
+    if phase == 0:
+        shapes = canvas.find_withtag("movable")
+        if shapes: canvas.send("<Button-1>", *bbox_center(shapes[(t // 100) % len(shapes)]))
+    elif phase < 20 and canvas.current_item in canvas.items:
+        step = 4 if (t // 100) % 2 == 0 else -4 # Back and forth so shapes stay on screen
+        x, y = bbox_center(canvas.current_item)
+        canvas.send("<B1-Motion>", x + step, y + step // 2)
+    elif phase == 20: canvas.send("<ButtonRelease-1>", 0, 0)
+    elif phase == 21: press_button("Record Frame")
+    if t % 2000 == 1500: press_button("Play")
+    elif t % 2000 == 1900: press_button("Stop")
+
+BENCH_SCRIPTS = {
+    "earthprotector": script_earthprotector,
+    "earthprotector-swarm": script_earthprotector,
+    "flight": script_flight,
+    "clicker": script_clicker,
+    "breakout": script_breakout,
+    "breakout-stress": script_breakout,
+    "snake": script_snake,
+    "drawing": script_drawing,
+    "animation": script_animation,
+}
+
+def bench_run(game, ticks, seed):
+    """Plays a mode for exactly `ticks` ticks, starting a new round whenever one ends."""
+    new_session(seed)
+    script = BENCH_SCRIPTS[game]
+    GAME_STARTERS[game]()
+    loops = clock.live("game")
+    rounds, total_score, peak_items = 1, 0, len(canvas.items)
+    start = time.perf_counter()
+    for tick in range(ticks):
+        script(tick)
+        clock.frame(TICK_MS)
+        peak_items = max(peak_items, len(canvas.items))
+        if any(not t['alive'] for t in loops): # A main loop stopped: the round is over
+            total_score += score
+            GAME_STARTERS[game]()
+            loops = clock.live("game")
+            rounds += 1
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'peak_items': peak_items, 'rounds': rounds, 'score': total_score + score}
+
+def keyframe_timing_mismatches(keyframes=3):
+    """Plays two keyframes at every rate in ANIM_FPS_CHOICES and spacing in KEYFRAME_MS_CHOICES.
+
+    Returns (fps, spacing, clock ms between keyframes) wherever keyframes
+    did not come exactly the spacing apart.
+    """
+    global anim_fps, anim_keyframe_ms
+    mismatches = []
+    for fps in ANIM_FPS_CHOICES:
+        for spacing in KEYFRAME_MS_CHOICES:
+            with redirect_stdout(io.StringIO()):
+                new_session(1)
+                start_animation_studio()
+                animation_record_frame() # A second keyframe to play towards
+                anim_fps, anim_keyframe_ms = fps, spacing
+                animation_toggle_play()
+            gaps, shown, since = [], current_frame_index, clock.sim_ms
+            while len(gaps) < keyframes and clock.sim_ms - since <= 2 * spacing:
+                now = clock.sim_ms
+                clock.step()
+                if current_frame_index != shown:
+                    gaps.append(now - since)
+                    shown, since = current_frame_index, now
+            if len(gaps) < keyframes or any(gap != spacing for gap in gaps):
+                mismatches.append((fps, spacing, gaps))
+    with redirect_stdout(io.StringIO()): to_menu()
+    return mismatches
+
+def bench_suite(ticks=2000, seed=1, save_baseline=False, tolerance=BENCH_TOLERANCE):
+    """Runs every mode with scripted input and compares against BENCH_BASELINE_FILE.
+
+    Each mode is played from the same seed BENCH_REPEATS times for timing
+    (the median run counts) and once more under tracemalloc for allocations.
+    Every run must play out the same (score and rounds) as each other and as
+    the baseline, and the last must not peak at more canvas items than the
+    first: anything left over from earlier runs is a leak. Speed depends on
+    the machine and its load, so it is reported but never gates. Animation
+    Studio keyframes must also come exactly their spacing apart at every
+    playback rate. Returns the number of regressions found.
+    """
+    results = {}
+    for game in GAME_STARTERS:
+        with redirect_stdout(io.StringIO()): # Games print progress messages
+            runs = [bench_run(game, ticks, seed) for _ in range(BENCH_REPEATS)]
+            tracemalloc.start()
+            runs.append(bench_run(game, ticks, seed))
+            alloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            to_menu()
+        first, timed = runs[0], sorted(r['seconds'] for r in runs[:-1])
+        results[game] = {
+            'ticks_per_sec': round(ticks / timed[len(timed) // 2]),
+            'peak_items': first['peak_items'],
+            'alloc_peak_kib': round(alloc_peak / 1024),
+            'rounds': first['rounds'],
+            'score': first['score'],
+            'deterministic': all((r['score'], r['rounds']) == (first['score'], first['rounds']) for r in runs),
+            'leaked_items': runs[-1]['peak_items'] - first['peak_items'],
+        }
+
+    baseline = {}
+    if os.path.exists(BENCH_BASELINE_FILE):
+        with open(BENCH_BASELINE_FILE) as f:
+            stored = json.load(f)
+        if (stored.get('ticks'), stored.get('seed')) == (ticks, seed): baseline = stored['results']
+        else: print(f"Baseline was recorded with ticks={stored.get('ticks')} seed={stored.get('seed')}; not comparing.")
+
+    def change(now, before):
+        return f"{(now - before) / before * 100:+.0f}%" if before else "--"
+
+    regressions = 0
+    print(f"{'game':<20} {'ticks/s':>8} {'vs base':>8} {'peak items':>10} {'vs base':>8} {'alloc KiB':>9} {'vs base':>8} {'rounds':>6} {'score':>6}")
+    for game, r in results.items():
+        base = baseline.get(game, {})
+        grew = base and (r['peak_items'] > base['peak_items'] * (1 + tolerance) or
+                         r['alloc_peak_kib'] > base['alloc_peak_kib'] * (1 + tolerance))
+        played = base and (r['rounds'], r['score']) != (base['rounds'], base['score'])
+        flags = (" BIGGER" if grew else "") + (" PLAYS DIFFERENTLY" if played else "")
+        if r['leaked_items'] > 0: flags += f" LEAKS({r['leaked_items']} items)"
+        if not r['deterministic']: flags += " NONDETERMINISTIC"
+        regressions += bool(flags)
+        print(f"{game:<20} {r['ticks_per_sec']:>8} {change(r['ticks_per_sec'], base.get('ticks_per_sec')):>8}"
+              f" {r['peak_items']:>10} {change(r['peak_items'], base.get('peak_items')):>8}"
+              f" {r['alloc_peak_kib']:>9} {change(r['alloc_peak_kib'], base.get('alloc_peak_kib')):>8}"
+              f" {r['rounds']:>6} {r['score']:>6}{flags}")
+    for fps, spacing, gaps in keyframe_timing_mismatches():
+        print(f"Animation keyframes {spacing} ms apart at {fps} fps came {gaps} ms apart: KEYFRAME TIMING")
+        regressions += 1
+
+    if save_baseline:
+        with open(BENCH_BASELINE_FILE, "w") as f:
+            json.dump({'ticks': ticks, 'seed': seed, 'results': results}, f, indent=1)
+            f.write("\n")
+        print(f"Baseline saved to {BENCH_BASELINE_FILE}")
+    return regressions
+
+BENCHMARKS = {
+    "collisions": bench_collisions,
+    "particles": bench_particles,
+    "snake": bench_snake,
+    "balls": bench_balls,
+    "terrain": bench_terrain,
+    "pbots": bench_pbots,
+    "drawing": bench_drawing,
+    "animation": bench_animation,
+    "record": bench_record,
+    "project": bench_project,
+    "export": bench_export,
+    "suite": bench_suite,
+}
+
+
+# ---------- Headless runner ----------
+GAME_STARTERS = {
+    "earthprotector": start_asteroid,
+    "earthprotector-swarm": lambda: start_asteroid(SWARM_PBOTS),
+    "flight": start_flight,
+    "clicker": lambda: start_clicker(30),
+    "breakout": start_breakout,
+    "breakout-stress": lambda: start_breakout(STRESS_BALLS, stress=True),
+    "snake": start_snake,
+    "drawing": start_drawing,
+    "animation": start_animation_studio,
+}
+
+def run_summary(game, ticks, elapsed):
+    return {
+        'game': game, 'seed': session_seed, 'ticks': ticks, 'seconds': round(elapsed, 4),
+        'ticks_per_sec': round(ticks / elapsed) if elapsed else 0,
+        'score': score, 'items': len(canvas.items),
+        'pools': {kind: pool.stats() for kind, pool in pools.items()},
+        'timers': clock.live_counts(),
+        'quality': governor.level,
+        'profile': profiler.summary(),
+    }
 
+def simulate(game, ticks, seed=None):
+    """Starts a game and steps the clock up to `ticks` times (stopping early once its loops end)."""
+    new_session(seed)
+    GAME_STARTERS[game]()
+    ran = 0
+    start = time.perf_counter()
+    while ran < ticks:
+        clock.frame(TICK_MS)
+        ran += 1
+        if "game" not in clock.groups: break
+    return run_summary(game, ran, time.perf_counter() - start)
+
+def play_replay(path, render=False):
+    """Replays a recorded session as fast as the clock can step it, drawing each frame if render."""
+    replay = load_replay(path)
+    new_session(replay['seed'])
+    if replay['game']: GAME_STARTERS[replay['game']]()
+    else: show_menu()
+    end = inputs.play(replay)
+    start = time.perf_counter()
+    while clock.sim_ms // TICK_MS < end:
+        clock.frame(TICK_MS)
+        if render: root.update()
+    inputs.stop()
+    return run_summary(replay['game'] or state, replay['ticks'], time.perf_counter() - start)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run Click Tech, or one of its games without a window.")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="print status messages while running")
+    parser.add_argument("--game", choices=sorted(GAME_STARTERS), default=None,
+                        help="game to run (default earthprotector); with a window, start in it instead of the menu")
+    parser.add_argument("--pbots", type=int, default=None, help=f"P-Bots in earthprotector-swarm (default {SWARM_PBOTS})")
+    parser.add_argument("--ticks", type=int, default=None, help="ticks to run (default 10000; 2000 per mode for the suite)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--bench", choices=sorted(BENCHMARKS), help="run a benchmark instead of a game")
+    parser.add_argument("--save-baseline", action="store_true", help="store the suite's results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE, help="suite growth threshold for peak items and allocations (0.15 = 15%%)")
+    parser.add_argument("--record", metavar="FILE", help="record the session's input to a replay file")
+    parser.add_argument("--replay", metavar="FILE", help="play a recorded session back at full speed")
+    parser.add_argument("--export", metavar="PATH", help=f"export {ANIM_PROJECT_FILE} to a .gif, a .png sprite sheet, "
+                        "or a folder of PNGs")
+    parser.add_argument("--workers", type=int, default=None, help="processes for --export (default: one per core)")
+    return parser.parse_args(argv)
+
+def run_headless(args):
+    if args.bench == "suite":
+        regressions = bench_suite(args.ticks or 2000, 1 if args.seed is None else args.seed, args.save_baseline, args.tolerance)
+        sys.exit(1 if regressions else 0)
+    elif args.bench:
+        BENCHMARKS[args.bench]()
+    elif args.replay:
+        print(json.dumps(play_replay(args.replay)))
+    elif args.export:
+        start = time.perf_counter()
+        project = AnimProject(ANIM_PROJECT_FILE)
+        export_animation(project, args.export, args.workers,
+                         lambda done, total: print(f"\rExporting {done}/{total}", end="", flush=True))
+        print(f"\nExported {len(project)} frames to {args.export} in {time.perf_counter() - start:.1f}s")
+    else:
+        game = args.game or "earthprotector"
+        if args.record: inputs.record()
+        result = simulate(game, args.ticks or 10000, args.seed)
+        if args.record: inputs.save(args.record, game)
+        print(json.dumps(result))
+
+def run_windowed(args):
+    if args.replay:
+        print(json.dumps(play_replay(args.replay, render=True)))
+    else:
+        new_session(args.seed)
+        if args.record: inputs.record()
+        if args.game: GAME_STARTERS[args.game]()
+        else: show_menu()
+    # Play on live from wherever a replay ended
+    watch_window()
+    clock.start()
+    root.mainloop()
+    if args.record: inputs.save(args.record, None if args.replay else args.game)
 
+
+# ---------- Start the application ----------
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.pbots: SWARM_PBOTS = args.pbots
+    if HEADLESS:
+        run_headless(args)
+    else:
+        run_windowed(args)